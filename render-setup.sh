@@ -43,7 +43,7 @@ echo "ChromeDriver version: $($HOME/bin/chromedriver --version || echo 'Not foun
 
 # Install pip requirements
 echo "==> Installing Python requirements"
-pip install selenium==4.18.1 requests==2.31.0 pandas==2.1.4 python-dotenv==1.0.1 schedule==1.2.1 beautifulsoup4==4.12.2 lxml==4.9.3 html5lib==1.1 numpy==1.23.5 pytz==2023.3 flask==2.3.2
+pip install selenium==4.18.1 requests==2.31.0 pandas==2.1.4 python-dotenv==1.0.1 schedule==1.2.1 beautifulsoup4==4.12.2 lxml==4.9.3 html5lib==1.1 numpy==1.23.5 pytz==2023.3 flask==2.3.2 pyarrow==14.0.2 waitress==2.1.2 watchdog==4.0.2
 
 # Cleanup
 echo "==> Cleaning up"
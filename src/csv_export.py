@@ -11,6 +11,7 @@ import sys
 import time
 import logging
 import getpass
+import threading
 from datetime import datetime, timedelta
 import pytz
 from dotenv import load_dotenv
@@ -24,6 +25,13 @@ from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from webdriver_manager.chrome import ChromeDriverManager
 
+# watchdog is optional; without it the download check falls back to polling the directory
+try:
+    from watchdog.observers import Observer
+    from watchdog.events import PatternMatchingEventHandler
+except ImportError:
+    Observer = None
+
 # Set up logging
 logging.basicConfig(
     level=logging.INFO,
@@ -244,6 +252,73 @@ def set_date_range(browser, start_date, end_date):
         logger.info("Continuing with the export process...")
         return True
 
+def scan_csv_files(directory):
+    """Return (path, mtime_ns) for every CSV file in directory, using the stat cached by scandir"""
+    with os.scandir(directory) as entries:
+        return [
+            (entry.path, entry.stat().st_mtime_ns)
+            for entry in entries
+            if entry.name.endswith(".csv") and entry.is_file()
+        ]
+
+def wait_for_download_watchdog(download_dir, start_download):
+    """Start the download and block until watchdog sees the call-logs CSV land (up to 5.5 minutes)"""
+    download_event = threading.Event()
+    
+    def on_csv_event(event):
+        file_path = getattr(event, 'dest_path', None) or event.src_path
+        if "call-logs" in os.path.basename(file_path).lower():
+            logger.info(f"Found downloaded CSV file: {os.path.basename(file_path)}")
+            download_event.set()
+    
+    handler = PatternMatchingEventHandler(patterns=["*.csv"], ignore_directories=True)
+    handler.on_created = on_csv_event
+    handler.on_modified = on_csv_event
+    handler.on_moved = on_csv_event  # Chrome renames the .crdownload file when it finishes
+    
+    # Watch the download directory before clicking so a fast download isn't missed
+    observer = Observer()
+    observer.schedule(handler, download_dir, recursive=False)
+    observer.start()
+    try:
+        start_download()
+        logger.info(f"Waiting for CSV download in: {download_dir}")
+        return download_event.wait(timeout=330)
+    finally:
+        observer.stop()
+        observer.join()
+
+def wait_for_download_polling(download_dir, start_download):
+    """Start the download and poll the directory until the call-logs CSV appears (up to 5.5 minutes)"""
+    # Files written after this point are the download; the second of slack covers
+    # filesystems whose timestamps lag the clock slightly
+    download_start_ns = time.time_ns() - 10**9
+    start_download()
+    
+    # Wait for the export to complete (longer wait)
+    logger.info("Waiting for CSV export to complete...")
+    time.sleep(30)
+    
+    # Check for download completion
+    logger.info(f"Checking for downloaded files in: {download_dir}")
+    start_time = time.time()
+    
+    while time.time() - start_time < 300:  # 5 minute timeout
+        # Look for CSV files that are new or rewritten since the click
+        new_files = [
+            file_path for file_path, mtime_ns in scan_csv_files(download_dir)
+            if mtime_ns >= download_start_ns and "call-logs" in os.path.basename(file_path).lower()
+        ]
+        if new_files:
+            logger.info(f"Found downloaded CSV file: {os.path.basename(new_files[0])}")
+            return True
+            
+        # Wait a bit before checking again
+        logger.info("Still waiting for download to complete...")
+        time.sleep(10)
+    
+    return False
+
 def click_export_csv(browser):
     """
     Click the 'Export CSV' button and handle the download
@@ -256,47 +331,22 @@ def click_export_csv(browser):
     """
     try:
         # Wait for the Export CSV button to be available with longer timeout
+        # element_to_be_clickable also waits out the disabled state while the report loads
         logger.info("Looking for Export CSV button...")
-        WebDriverWait(browser, 60).until(
+        export_button = WebDriverWait(browser, 60, poll_frequency=0.5).until(
             EC.element_to_be_clickable((By.CSS_SELECTOR, ".export-summary-btn"))
         )
         
-        # Click the Export CSV button
-        export_button = browser.find_element(By.CSS_SELECTOR, ".export-summary-btn")
-        logger.info("Clicking Export CSV button...")
-        export_button.click()
+        download_dir = os.path.abspath(os.getcwd())
         
-        # Wait for the export to complete (longer wait)
-        logger.info("Waiting for CSV export to complete...")
-        time.sleep(30)
+        def click_export_button():
+            # Click the Export CSV button found by the wait above
+            logger.info("Clicking Export CSV button...")
+            export_button.click()
         
-        # Check for download completion
-        download_dir = os.path.abspath(os.getcwd())
-        logger.info(f"Checking for downloaded files in: {download_dir}")
-        
-        # Wait for download to complete (up to 5 minutes)
-        start_time = time.time()
-        downloaded = False
-        
-        while time.time() - start_time < 300:  # 5 minute timeout
-            # Look for CSV files that were recently created
-            for file in os.listdir(download_dir):
-                if file.endswith(".csv") and "call-logs" in file.lower():
-                    file_path = os.path.join(download_dir, file)
-                    
-                    # Check if file was created in the last 5 minutes
-                    file_time = os.path.getctime(file_path)
-                    if time.time() - file_time < 300:
-                        logger.info(f"Found downloaded CSV file: {file}")
-                        downloaded = True
-                        break
-            
-            if downloaded:
-                break
-                
-            # Wait a bit before checking again
-            logger.info("Still waiting for download to complete...")
-            time.sleep(10)
+        # watchdog reacts to the download as it lands; without it, poll the directory
+        wait_for_download = wait_for_download_watchdog if Observer is not None else wait_for_download_polling
+        downloaded = wait_for_download(download_dir, click_export_button)
         
         if downloaded:
             logger.info("CSV export completed successfully")
@@ -12,6 +12,7 @@ import os
 import sys
 from dotenv import load_dotenv
 import pytz
+from concurrent.futures import ThreadPoolExecutor
 
 # Configure logging
 logging.basicConfig(
@@ -54,14 +55,11 @@ class RingbaDirectAPI:
             }
             self.current_auth_format = auth_format_env
         else:
-            # Default to Bearer token initially
+            # Default to Bearer token initially; the working format is detected below once base_url is set
             self.headers = {
                 "Content-Type": "application/json",
                 "Authorization": f"Bearer {self.api_token}"
             }
-            
-            # Try to detect the working authentication format
-            self._detect_working_format()
         
         # Base URL with account ID
         self.base_url = f"https://api.ringba.com/v2/{self.account_id}"
@@ -74,17 +72,27 @@ class RingbaDirectAPI:
     def _detect_working_format(self):
         """Test different authentication formats to find the one that works"""
         logger.info("Attempting to detect working authentication format")
+        url = f"{self.base_url}/targets"
         
-        for auth_format in self.auth_formats:
+        def try_format(auth_format):
             test_headers = {
                 "Content-Type": "application/json",
                 "Authorization": auth_format["header"]
             }
-            
             # Try a simple API call to test authentication
-            try:
-                url = f"{self.base_url}/targets"
-                response = requests.get(url, headers=test_headers)
+            return auth_format, test_headers, requests.get(url, headers=test_headers, timeout=(5, 30))
+        
+        # Probe every format at once so detection takes one round-trip instead of up to three,
+        # but read the results in list order so the earliest accepted format still wins
+        executor = ThreadPoolExecutor(max_workers=len(self.auth_formats))
+        try:
+            futures = [executor.submit(try_format, auth_format) for auth_format in self.auth_formats]
+            for auth_format, future in zip(self.auth_formats, futures):
+                try:
+                    _, test_headers, response = future.result()
+                except Exception as e:
+                    logger.error(f"Error testing auth format {auth_format['name']}: {str(e)}")
+                    continue
                 
                 if response.status_code == 200:
                     logger.info(f"Auth format {auth_format['name']} works!")
@@ -94,8 +102,9 @@ class RingbaDirectAPI:
                     return True
                 else:
                     logger.info(f"Auth format {auth_format['name']} failed with status {response.status_code}")
-            except Exception as e:
-                logger.error(f"Error testing auth format {auth_format['name']}: {str(e)}")
+        finally:
+            # Don't wait on probes for formats after the one that worked
+            executor.shutdown(wait=False)
         
         logger.error("No working authentication format found")
         return False
@@ -7,21 +7,21 @@ setting the date range, and exporting the CSV.
 """
 
 import os
+import re
+import concurrent.futures
 import sys
 import time
 import logging
+import logging.handlers
+import queue
+import select
+import socket
+import atexit
+import contextlib
+import random
 from datetime import datetime, timedelta
 import pytz
 from dotenv import load_dotenv
-# Import Chrome setup module to ensure Chrome is installed
-try:
-    from src import setup_chrome
-except ImportError:
-    try:
-        import setup_chrome
-    except ImportError:
-        print("Warning: Could not import setup_chrome module")
-
 from selenium import webdriver
 from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.chrome.options import Options
@@ -30,24 +30,72 @@ from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.common.keys import Keys
 from selenium.webdriver.common.action_chains import ActionChains
+from selenium.common.exceptions import TimeoutException, WebDriverException
 from webdriver_manager.chrome import ChromeDriverManager
 import pandas as pd
+import numpy as np
 import threading
 import signal
-import pickle
+import traceback
+import json
 import requests
+from urllib3.util.retry import Retry
 import base64
 import csv
-import schedule
+try:
+    import fcntl
+except ImportError:
+    # Not available on Windows; scheduled runs are then not cross-process locked
+    fcntl = None
 
 # Load environment variables
 load_dotenv()
 
-# Configure logger
+class BatchedStreamHandler(logging.StreamHandler):
+    """StreamHandler that joins records arriving together into one write, flushing once the log queue is drained"""
+    
+    def __init__(self, log_queue, capacity=64):
+        super().__init__()
+        self.log_queue = log_queue
+        self.capacity = capacity
+        self.pending = []
+    
+    def emit(self, record):
+        try:
+            self.pending.append(self.format(record) + self.terminator)
+            if len(self.pending) >= self.capacity or record.levelno >= logging.ERROR or self.log_queue.empty():
+                self.flush()
+        except Exception:
+            self.handleError(record)
+    
+    def flush(self):
+        self.acquire()
+        try:
+            if self.pending:
+                self.stream.write("".join(self.pending))
+                self.pending.clear()
+            super().flush()
+        finally:
+            self.release()
+
+def stop_logging():
+    """Drain the log queue and write out anything still buffered"""
+    LOG_LISTENER.stop()
+    log_stream_handler.flush()
+
+# Configure logger; records are queued and written by a listener thread so logging never blocks a check
+log_queue = queue.Queue(-1)
+log_stream_handler = BatchedStreamHandler(log_queue)
+log_stream_handler.setFormatter(logging.Formatter("%(asctime)s [%(levelname)s] %(message)s"))
+LOG_LISTENER = logging.handlers.QueueListener(log_queue, log_stream_handler)
+LOG_LISTENER.start()
+atexit.register(stop_logging)
+log_queue_handler = logging.handlers.QueueHandler(log_queue)
+# The listener's handler applies the real format; keep the queued message unformatted
+log_queue_handler.setFormatter(logging.Formatter("%(message)s"))
 logging.basicConfig(
     level=logging.INFO,
-    format="%(asctime)s [%(levelname)s] %(message)s",
-    handlers=[logging.StreamHandler()]
+    handlers=[log_queue_handler]
 )
 logger = logging.getLogger(__name__)
 
@@ -56,27 +104,89 @@ RINGBA_USERNAME = os.getenv('RINGBA_USERNAME')
 RINGBA_PASSWORD = os.getenv('RINGBA_PASSWORD')
 RINGBA_API_TOKEN = os.getenv('RINGBA_API_TOKEN')
 RINGBA_ACCOUNT_ID = os.getenv('RINGBA_ACCOUNT_ID')
+RINGBA_AUTH_FORMAT = os.getenv('RINGBA_AUTH_FORMAT', 'Bearer')
 SLACK_WEBHOOK_URL = os.getenv('SLACK_WEBHOOK_URL')
+SLACK_CHANNEL = os.getenv('SLACK_CHANNEL', '')
+SLACK_BOT_TOKEN = os.getenv('SLACK_BOT_TOKEN', '')
+NOTIFY_ON_EMPTY = os.getenv('NOTIFY_ON_EMPTY', '0') == '1'
 USE_HEADLESS = os.getenv('USE_HEADLESS', 'true').lower() == 'true'
 RPC_THRESHOLD = float(os.getenv('RPC_THRESHOLD', '12.0'))
 MORNING_CHECK_TIME = os.getenv('MORNING_CHECK_TIME', '11:00')
 MIDDAY_CHECK_TIME = os.getenv('MIDDAY_CHECK_TIME', '14:00')
 AFTERNOON_CHECK_TIME = os.getenv('AFTERNOON_CHECK_TIME', '16:30')
+# Web-service mode is selected by the platform setting PORT
+IS_WEB_SERVICE = bool(os.getenv('PORT'))
+PORT = int(os.getenv('PORT') or 8080)
+GLOBAL_TIMEOUT_SECONDS = int(os.getenv('GLOBAL_TIMEOUT_MINUTES', '10')) * 60
+
+# Shared HTTP session so Slack posts reuse one kept-alive connection; only connection
+# failures are retried here (the message was never sent), 429s are handled by post_to_slack_with_backoff
+SLACK_SESSION = requests.Session()
+SLACK_SESSION.mount('https://', requests.adapters.HTTPAdapter(
+    pool_connections=2, pool_maxsize=4,
+    max_retries=Retry(total=2, connect=2, read=0, status=0, backoff_factor=0.3)
+))
+# Shared session for the Ringba API; the insights query is read-only, so POSTs are safe to retry
+RINGBA_SESSION = requests.Session()
+RINGBA_SESSION.mount('https://', requests.adapters.HTTPAdapter(
+    pool_connections=4, pool_maxsize=8,
+    max_retries=Retry(total=2, backoff_factor=0.3, status_forcelist=[429, 500, 502, 503, 504],
+                      allowed_methods=frozenset(['GET', 'POST']), raise_on_status=False)
+))
+# Attempts for a Slack post that keeps getting rate limited (HTTP 429)
+SLACK_MAX_ATTEMPTS = 5
+
+# Currency symbols, thousands separators and whitespace stripped from RPC values
+CURRENCY_CLEANUP_RE = re.compile(r'[\$,£€\s]')
+# Label for the comparison row without a target name (the report's totals row)
+TOTAL_ROW_LABEL = "Total RPC (including the ones below $12)"
+# Known column names for the Target and RPC values, in order of preference
+TARGET_COLUMN_NAMES = ('Target', 'Target Name', 'TargetName', 'Campaign', 'Target Campaign')
+RPC_COLUMN_NAMES = ('RPC', 'Avg. Revenue per Call', 'Revenue Per Call', 'Revenue per Call', 'RPCall', 'Revenue')
+# Cell values that mark the Target column in generically named (Column1, Column2, ...) extracts
+TARGET_VALUE_WORDS = ('target', 'live', 'completed', 'ivr')
+# Number of rows sampled when guessing columns from their values
+COLUMN_SAMPLE_ROWS = 50
+# Chrome session kept between runs so each scheduled check skips the browser start-up;
+# BROWSER_LOCK is held by whichever run is currently using it
+BROWSER_LOCK = threading.Lock()
+SHARED_BROWSER = {'browser': None}
+# Login form fields; each is a CSS union of the layouts Ringba's login page has used
+LOGIN_USERNAME_SELECTOR = ("#mat-input-0, input[name='username'], input[type='email'], input[formcontrolname='username'], "
+                           "input.username, input[placeholder='Username'], input[placeholder='Email']")
+LOGIN_PASSWORD_SELECTOR = "#mat-input-1, input[name='password'], input[type='password'], input[formcontrolname='password'], input[placeholder='Password']"
+LOGIN_BUTTON_SELECTOR = "button[type='submit'], .login-button, button.mat-button"
+# Buttons identified only by their label can't be matched in CSS
+LOGIN_BUTTON_TEXT_XPATH = "//button[contains(text(), 'Login') or contains(text(), 'Sign In')]"
+# Seconds between scheduler heartbeat logs (keeps Render.com from treating the worker as idle)
+HEARTBEAT_INTERVAL_SECONDS = 60
+# Set once the web service's initial test run has finished
+TEST_RUN_DONE = threading.Event()
+# Lock file that lets only one process run a given scheduled check
+EXPORT_LOCK_FILE = os.path.join("/tmp", "ringba_export.lock")
+# Error notifications sent within this many seconds of the last one are batched into one Slack post
+ERROR_COALESCE_SECONDS = 2.0
+ERROR_NOTIFY_LOCK = threading.Lock()
+PENDING_ERROR_MESSAGES = []
+ERROR_NOTIFY_STATE = {'last_sent': 0.0, 'timer': None}
 
 # Create screenshots directory if it doesn't exist
 screenshots_dir = "screenshots"
-if not os.path.exists(screenshots_dir):
-    os.makedirs(screenshots_dir)
+os.makedirs(screenshots_dir, exist_ok=True)
 
-def take_screenshot(browser, name):
-    """Take a screenshot for debugging purposes"""
+# In container environments, use /tmp which is guaranteed to be writable; set up once, not per browser
+DOWNLOAD_DIR = "/tmp"
+os.makedirs(DOWNLOAD_DIR, exist_ok=True)
+# Set the global download directory as an environment variable
+os.environ["DOWNLOAD_DIR"] = DOWNLOAD_DIR
+
+def take_screenshot(browser, name, force=False):
+    """Take a screenshot for debugging purposes; progress shots only when DEBUG logging is on, failure shots (force) always"""
+    if not force and not logger.isEnabledFor(logging.DEBUG):
+        return
     try:
+        # The screenshots directory is created at import
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        
-        # Make sure the screenshots directory exists
-        if not os.path.exists(screenshots_dir):
-            os.makedirs(screenshots_dir)
-            
         filename = f"{screenshots_dir}/{timestamp}_{name}.png"
         
         # Try different methods to take a screenshot
@@ -150,6 +260,16 @@ def debug_environment():
 def setup_browser():
     """Set up the Chrome browser with absolute minimum resources for container environments"""
     try:
+        # Import Chrome setup module to ensure Chrome is installed; only the browser
+        # fallback needs it, so runs served by the Ringba API never download Chrome
+        try:
+            from src import setup_chrome
+        except ImportError:
+            try:
+                import setup_chrome
+            except ImportError:
+                logger.warning("Could not import setup_chrome module")
+        
         # Find Chrome and ChromeDriver in PATH or HOME directory
         chrome_path = None
         chromedriver_path = None
@@ -185,30 +305,38 @@ def setup_browser():
         
         # Use smaller window and memory footprint
         chrome_options.add_argument("--window-size=800,600")
-        chrome_options.add_argument("--single-process")
-        
-        # Set page load strategy to minimize resource usage
-        chrome_options.page_load_strategy = 'eager'
-        
-        # In container environments, use /tmp which is guaranteed to be writable
-        download_dir = "/tmp"
-        os.makedirs(download_dir, exist_ok=True)
-        logger.info(f"Using /tmp as download directory for container compatibility")
+        chrome_options.add_argument("--blink-settings=imagesEnabled=false")
+        
+        # Turn off background services a headless scraping session never uses
+        chrome_options.add_argument("--disable-background-networking")
+        chrome_options.add_argument("--disable-background-timer-throttling")
+        chrome_options.add_argument("--disable-renderer-backgrounding")
+        chrome_options.add_argument("--disable-sync")
+        chrome_options.add_argument("--disable-translate")
+        chrome_options.add_argument("--disable-default-apps")
+        chrome_options.add_argument("--disable-features=Translate,MediaRouter,OptimizationHints,CertificateTransparencyComponentUpdater")
+        chrome_options.add_argument("--no-first-run")
+        chrome_options.add_argument("--no-default-browser-check")
+        chrome_options.add_argument("--metrics-recording-only")
+        
+        # Don't block in browser.get(); every navigation is followed by an explicit wait
+        # for the element or document state it actually needs
+        chrome_options.page_load_strategy = 'none'
         
         # Set very explicit download settings
         prefs = {
-            "download.default_directory": download_dir,
+            "download.default_directory": DOWNLOAD_DIR,
             "download.prompt_for_download": False,
             "download.directory_upgrade": True,
             "safebrowsing.enabled": False,
             "profile.default_content_settings.popups": 0,
-            "browser.helperApps.neverAsk.saveToDisk": "application/csv,text/csv"
+            "browser.helperApps.neverAsk.saveToDisk": "application/csv,text/csv",
+            # The report is read from the DOM, so images are never needed
+            "profile.managed_default_content_settings.images": 2,
+            "profile.default_content_setting_values.images": 2
         }
         chrome_options.add_experimental_option("prefs", prefs)
         
-        # Set the global download directory as an environment variable
-        os.environ["DOWNLOAD_DIR"] = download_dir
-        
         # Log the final Chrome options
         logger.info(f"Setting up Chrome with options: {chrome_options.arguments}")
         
@@ -221,9 +349,17 @@ def setup_browser():
             logger.info("Using system ChromeDriver")
             browser = webdriver.Chrome(options=chrome_options)
         
+        # Install the table extraction routines in every document the session loads, so
+        # extraction never has to send the script over the driver connection
+        try:
+            browser.execute_cdp_cmd("Page.addScriptToEvaluateOnNewDocument", {"source": RINGBA_EXTRACTION_JS})
+        except Exception as e:
+            logger.warning(f"Could not preinstall extraction routines, they will be sent on first use: {str(e)}")
+        
         # Set timeouts
         browser.set_page_load_timeout(60)
-        browser.implicitly_wait(10)
+        # No implicit wait: it stacks on top of every WebDriverWait poll that misses
+        browser.implicitly_wait(0)
         
         logger.info("Chrome browser set up successfully")
         return browser
@@ -231,68 +367,115 @@ def setup_browser():
         logger.error(f"Failed to set up browser: {str(e)}")
         return None
 
+def get_browser():
+    """Return the shared Chrome session, starting a new one if there is none or it has died (caller holds BROWSER_LOCK)"""
+    browser = SHARED_BROWSER['browser']
+    if browser is not None:
+        try:
+            # Cheap round-trip to confirm the session is still alive
+            browser.current_url
+            logger.info("Reusing existing Chrome session")
+            return browser
+        except WebDriverException as e:
+            logger.warning(f"Existing Chrome session is unusable, starting a new one: {str(e)}")
+            try:
+                browser.quit()
+            except Exception:
+                pass
+            SHARED_BROWSER['browser'] = None
+    
+    browser = setup_browser()
+    SHARED_BROWSER['browser'] = browser
+    return browser
+
+def release_browser(browser):
+    """Reset the shared Chrome session for the next run (caller holds BROWSER_LOCK)"""
+    try:
+        # Clear the login so the next run starts from the login form again
+        browser.execute_script("window.localStorage.clear(); window.sessionStorage.clear();")
+        browser.delete_all_cookies()
+        browser.get("about:blank")
+    except WebDriverException as e:
+        logger.warning(f"Could not reset Chrome session, it will be restarted next run: {str(e)}")
+        try:
+            browser.quit()
+        except Exception:
+            pass
+        SHARED_BROWSER['browser'] = None
+
+@contextlib.contextmanager
+def shared_browser():
+    """Hold the shared Chrome session for one run, yielding None if it can't be had"""
+    # A run stuck past the global timeout shouldn't block every later check forever
+    if not BROWSER_LOCK.acquire(timeout=GLOBAL_TIMEOUT_SECONDS):
+        logger.error(f"Chrome session still in use after {GLOBAL_TIMEOUT_SECONDS} seconds, giving up on this run")
+        yield None
+        return
+    browser = None
+    try:
+        browser = get_browser()
+        yield browser
+    finally:
+        try:
+            if browser:
+                release_browser(browser)
+        finally:
+            BROWSER_LOCK.release()
+
+def quit_shared_browser():
+    """Shut down the shared Chrome session at exit"""
+    # Don't pull the session out from under a check that is still using it
+    if not BROWSER_LOCK.acquire(timeout=30):
+        logger.warning("Chrome session still in use at exit, leaving it running")
+        return
+    try:
+        browser = SHARED_BROWSER['browser']
+        if browser is not None:
+            try:
+                browser.quit()
+            except Exception:
+                pass
+            SHARED_BROWSER['browser'] = None
+    finally:
+        BROWSER_LOCK.release()
+
+atexit.register(quit_shared_browser)
+
 def login_to_ringba(browser):
     """Login to Ringba dashboard"""
     try:
         # Navigate to login page
         logger.info("Navigating to Ringba login page...")
         browser.get("https://app.ringba.com/#/login")
-        time.sleep(10)  # Wait longer for page to load
-        
-        # Take screenshot for debugging
-        take_screenshot(browser, "before_login")
         
-        # Wait for login form to be present
+        # Wait for login form to be present instead of sleeping a fixed 10 seconds;
+        # each field's alternatives are one CSS union so every poll is a single DOM query
         logger.info("Waiting for login form...")
         wait = WebDriverWait(browser, 30)
+        try:
+            username_input = wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, LOGIN_USERNAME_SELECTOR)))
+        except TimeoutException:
+            username_input = None
         
-        # Try different approaches to find the username field
-        username_input = None
-        username_selectors = [
-            (By.ID, "mat-input-0"),
-            (By.NAME, "username"),
-            (By.CSS_SELECTOR, "input[type='email']"),
-            (By.CSS_SELECTOR, "input[formcontrolname='username']"),
-            (By.CSS_SELECTOR, "input.username"),
-            (By.XPATH, "//input[@placeholder='Username' or @placeholder='Email']")
-        ]
-        
-        for selector_type, selector in username_selectors:
-            try:
-                logger.info(f"Trying to find username field with {selector_type}={selector}")
-                username_input = wait.until(EC.presence_of_element_located((selector_type, selector)))
-                logger.info(f"Found username field with {selector_type}={selector}")
-                break
-            except:
-                continue
+        # Take screenshot for debugging
+        take_screenshot(browser, "before_login")
         
         if not username_input:
             logger.error("Could not find username field")
-            take_screenshot(browser, "username_not_found")
+            take_screenshot(browser, "username_not_found", force=True)
             return False
         
-        # Try different approaches to find the password field
-        password_input = None
-        password_selectors = [
-            (By.ID, "mat-input-1"),
-            (By.NAME, "password"),
-            (By.CSS_SELECTOR, "input[type='password']"),
-            (By.CSS_SELECTOR, "input[formcontrolname='password']"),
-            (By.XPATH, "//input[@placeholder='Password']")
-        ]
+        # The form is up by now, so the other fields only need a short wait
+        selector_wait = WebDriverWait(browser, 3)
         
-        for selector_type, selector in password_selectors:
-            try:
-                logger.info(f"Trying to find password field with {selector_type}={selector}")
-                password_input = wait.until(EC.presence_of_element_located((selector_type, selector)))
-                logger.info(f"Found password field with {selector_type}={selector}")
-                break
-            except:
-                continue
+        try:
+            password_input = selector_wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, LOGIN_PASSWORD_SELECTOR)))
+        except TimeoutException:
+            password_input = None
         
         if not password_input:
             logger.error("Could not find password field")
-            take_screenshot(browser, "password_not_found")
+            take_screenshot(browser, "password_not_found", force=True)
             return False
         
         # Enter credentials
@@ -306,23 +489,16 @@ def login_to_ringba(browser):
         take_screenshot(browser, "credentials_entered")
         
         # Try to find and click the login button
-        login_button = None
-        button_selectors = [
-            (By.XPATH, "//button[@type='submit']"),
-            (By.CSS_SELECTOR, "button[type='submit']"),
-            (By.XPATH, "//button[contains(text(), 'Login') or contains(text(), 'Sign In')]"),
-            (By.CSS_SELECTOR, ".login-button"),
-            (By.CSS_SELECTOR, "button.mat-button")
-        ]
+        try:
+            login_button = selector_wait.until(EC.element_to_be_clickable((By.CSS_SELECTOR, LOGIN_BUTTON_SELECTOR)))
+        except TimeoutException:
+            login_button = None
         
-        for selector_type, selector in button_selectors:
+        if not login_button:
             try:
-                logger.info(f"Trying to find login button with {selector_type}={selector}")
-                login_button = wait.until(EC.element_to_be_clickable((selector_type, selector)))
-                logger.info(f"Found login button with {selector_type}={selector}")
-                break
-            except:
-                continue
+                login_button = selector_wait.until(EC.element_to_be_clickable((By.XPATH, LOGIN_BUTTON_TEXT_XPATH)))
+            except TimeoutException:
+                login_button = None
         
         if login_button:
             logger.info("Clicking login button...")
@@ -343,7 +519,7 @@ def login_to_ringba(browser):
         return True
     except Exception as e:
         logger.error(f"Failed to login to Ringba: {str(e)}")
-        take_screenshot(browser, "login_error")
+        take_screenshot(browser, "login_error", force=True)
         return False
 
 def navigate_to_call_logs(browser):
@@ -351,25 +527,21 @@ def navigate_to_call_logs(browser):
     max_retries = 3
     for attempt in range(max_retries):
         try:
-            # Clear memory before navigation
-            browser.execute_script("if(window.gc) window.gc();")
-            
             # Directly navigate to the Call Logs URL with a simpler approach
             logger.info(f"Navigating to call logs (attempt {attempt+1}/{max_retries})...")
             
-            # First go to a lighter page to ensure stability
-            browser.get("https://app.ringba.com/#/dashboard")
-            time.sleep(5)  # Give page time to stabilize
-            
-            # Force garbage collection
-            browser.execute_script("if(window.gc) window.gc();")
-            
-            # Now navigate to the call logs with reduced elements
+            # Go straight to the call logs; the SPA is already loaded after login, so a
+            # stop at the dashboard first would only cost an extra page load
             browser.get("https://app.ringba.com/#/dashboard/call-logs/report/summary?limit=50")
             
             # Wait for page to load with a simpler check
             logger.info("Waiting for call logs page to load...")
-            time.sleep(10)
+            try:
+                WebDriverWait(browser, 30).until(
+                    lambda d: "call-logs" in d.current_url and d.execute_script("return document.readyState") == "complete"
+                )
+            except TimeoutException:
+                logger.warning("Call logs page did not finish loading within 30 seconds")
             
             # Take screenshot for debugging
             take_screenshot(browser, f"call_logs_page_attempt_{attempt+1}")
@@ -406,24 +578,11 @@ def set_date_range(browser, start_date, end_date):
     take_screenshot(browser, "skipping_date_range")
     return True
 
-def click_export_csv(browser):
-    """Directly scrape the table data from the page instead of exporting CSV"""
+def capture_page_structure(browser):
+    """Highlight and dump the table structure of the current page for debugging"""
     try:
-        # Navigate directly to the summary page
-        logger.info("Navigating directly to call summary report...")
-        try:
-            browser.get("https://app.ringba.com/#/dashboard/call-logs/report/summary")
-            logger.info("Waiting for summary page to load...")
-            time.sleep(20)  # Give page more time to load
-        except Exception as e:
-            logger.error(f"Failed to navigate to summary page: {str(e)}")
-            take_screenshot(browser, "navigation_failed")
-        
-        # Take screenshot of the full page
-        take_screenshot(browser, "before_table_extraction")
-        
-        # Take additional debugging screenshots of the page structure
-        browser.execute_script("""
+        # Highlight the table elements and collect the page HTML and table details in one call
+        page_structure = browser.execute_script("""
             // Highlight table elements for debugging
             const tables = document.querySelectorAll('table, [role="grid"], [role="table"]');
             const oldBorders = [];
@@ -460,21 +619,8 @@ def click_export_csv(browser):
             `;
             
             document.body.appendChild(debugDiv);
-        """)
-        
-        # Take a screenshot with highlighted elements
-        take_screenshot(browser, "table_elements_highlighted")
-        
-        # Get page HTML for debugging
-        page_html = browser.execute_script("return document.documentElement.outerHTML;")
-        html_path = os.path.join(screenshots_dir, f"{int(time.time())}_page_source.html")
-        with open(html_path, 'w', encoding='utf-8') as f:
-            f.write(page_html)
-        logger.info(f"Saved page HTML to {html_path}")
-        
-        # Get detailed DOM info about table elements
-        table_info = browser.execute_script("""
-            const tables = document.querySelectorAll('table, [role="grid"], [role="table"]');
+            
+            // Get detailed DOM info about table elements
             const tableInfo = [];
             
             tables.forEach((table, i) => {
@@ -498,9 +644,23 @@ def click_export_csv(browser):
                 });
             });
             
-            return tableInfo;
+            return {
+                html: document.documentElement.outerHTML,
+                tables: tableInfo
+            };
         """)
         
+        # Take a screenshot with highlighted elements
+        take_screenshot(browser, "table_elements_highlighted", force=True)
+        
+        # Save page HTML for debugging
+        html_path = os.path.join(screenshots_dir, f"{int(time.time())}_page_source.html")
+        with open(html_path, 'w', encoding='utf-8') as f:
+            f.write(page_structure['html'])
+        logger.info(f"Saved page HTML to {html_path}")
+        
+        table_info = page_structure['tables']
+        
         # Log detailed table information
         if table_info:
             logger.info(f"Found {len(table_info)} potential tables on page:")
@@ -508,1242 +668,1354 @@ def click_export_csv(browser):
                 logger.info(f"Table {i}: {table.get('tag', 'unknown')} (class='{table.get('className', '')}', id='{table.get('id', '')}') - {table.get('rowCount', 0)} rows, {table.get('cellCount', 0)} cells, visible: {table.get('isVisible', False)}")
         else:
             logger.warning("No tables found on page for debugging")
-        
-        # Try direct Ringba UI structure extraction
-        logger.info("Trying direct extraction based on Ringba UI structure...")
-        ringba_structure_data = browser.execute_script("""
-            console.log('Starting direct Ringba UI structure extraction...');
-            
-            // Specific method to extract data from ag-Grid components (which Ringba uses)
-            function extractAgGridData() {
-                console.log('Looking for ag-Grid components...');
-                
-                // First identify the ag-Grid containers
-                const agGridElements = document.querySelectorAll('.ag-root, [class*="ag-root"]');
-                console.log(`Found ${agGridElements.length} ag-Grid elements`);
-                
-                // Look specifically for the summary grid at the bottom of the page (where Target and RPC columns are)
-                // This is likely the second grid based on the screenshot
-                let summaryGrid = null;
-                let targetColumnIndex = -1;
-                let rpcColumnIndex = -1;
-                
-                // First look for the "Summary" section which contains our grid
-                const summarySection = document.querySelector('.summary-section, [id*="summary"], [class*="summary"]');
-                if (summarySection) {
-                    summaryGrid = summarySection.querySelector('.ag-root, [class*="ag-root"]');
+    except Exception as e:
+        logger.error(f"Failed to capture page structure: {str(e)}")
+
+# Table extraction routines for the Ringba summary page. They are installed once per
+# page as window.__ringba so repeat attempts only send a short call over the driver.
+RINGBA_EXTRACTION_JS = """
+window.__ringba = window.__ringba || {
+    // Extraction based on the Ringba UI structure (ag-Grid and aligned headers)
+    extractStructure: function() {
+        console.log('Starting direct Ringba UI structure extraction...');
+
+        // Specific method to extract data from ag-Grid components (which Ringba uses)
+        function extractAgGridData() {
+            console.log('Looking for ag-Grid components...');
+
+            // First identify the ag-Grid containers
+            const agGridElements = document.querySelectorAll('.ag-root, [class*="ag-root"]');
+            console.log(`Found ${agGridElements.length} ag-Grid elements`);
+
+            // Look specifically for the summary grid at the bottom of the page (where Target and RPC columns are)
+            // This is likely the second grid based on the screenshot
+            let summaryGrid = null;
+            let targetColumnIndex = -1;
+            let rpcColumnIndex = -1;
+
+            // First look for the "Summary" section which contains our grid
+            const summarySection = document.querySelector('.summary-section, [id*="summary"], [class*="summary"]');
+            if (summarySection) {
+                summaryGrid = summarySection.querySelector('.ag-root, [class*="ag-root"]');
+            }
+
+            // If we didn't find it that way, check if one of the grids we found has Target and RPC headers
+            if (!summaryGrid && agGridElements.length > 0) {
+                // Check each grid for Target and RPC headers
+                for (const grid of agGridElements) {
+                    const headerCells = grid.querySelectorAll('.ag-header-cell, [class*="header-cell"], [role="columnheader"]');
+
+                    // Check if this grid has both Target and RPC headers
+                    let hasTarget = false;
+                    let hasRPC = false;
+
+                    headerCells.forEach((cell, index) => {
+                        const text = cell.textContent.trim();
+                        if (text === 'Target') {
+                            hasTarget = true;
+                            targetColumnIndex = index;
+                        } else if (text === 'RPC') {
+                            hasRPC = true;
+                            rpcColumnIndex = index;
+                        }
+                    });
+
+                    if (hasTarget && hasRPC) {
+                        summaryGrid = grid;
+                        break;
+                    }
                 }
-                
-                // If we didn't find it that way, check if one of the grids we found has Target and RPC headers
+
+                // If we didn't find a grid with both Target and RPC, use the last grid (often the main data grid)
                 if (!summaryGrid && agGridElements.length > 0) {
-                    // Check each grid for Target and RPC headers
-                    for (const grid of agGridElements) {
-                        const headerCells = grid.querySelectorAll('.ag-header-cell, [class*="header-cell"], [role="columnheader"]');
-                        
-                        // Check if this grid has both Target and RPC headers
-                        let hasTarget = false;
-                        let hasRPC = false;
-                        
-                        headerCells.forEach((cell, index) => {
-                            const text = cell.textContent.trim();
-                            if (text === 'Target') {
-                                hasTarget = true;
-                                targetColumnIndex = index;
-                            } else if (text === 'RPC') {
-                                hasRPC = true;
-                                rpcColumnIndex = index;
-                            }
-                        });
-                        
-                        if (hasTarget && hasRPC) {
-                            summaryGrid = grid;
-                            break;
-                        }
+                    summaryGrid = agGridElements[agGridElements.length - 1];
+                }
+            }
+
+            if (summaryGrid) {
+                console.log('Found summary grid for extraction');
+
+                // First identify the column headers to find Target and RPC columns
+                const headerCells = summaryGrid.querySelectorAll('.ag-header-cell, [class*="header-cell"], [role="columnheader"]');
+
+                // Extract header texts
+                const headers = [];
+                headerCells.forEach(cell => {
+                    const headerText = cell.textContent.trim();
+                    headers.push(headerText);
+
+                    // Track the indices of our target columns
+                    if (headerText === 'Target') {
+                        targetColumnIndex = headers.length - 1;
+                    } else if (headerText === 'RPC') {
+                        rpcColumnIndex = headers.length - 1;
                     }
-                    
-                    // If we didn't find a grid with both Target and RPC, use the last grid (often the main data grid)
-                    if (!summaryGrid && agGridElements.length > 0) {
-                        summaryGrid = agGridElements[agGridElements.length - 1];
+                });
+
+                console.log(`Found headers: ${headers.join(', ')}`);
+                console.log(`Target column index: ${targetColumnIndex}, RPC column index: ${rpcColumnIndex}`);
+
+                // Try two approaches to get the cell data
+
+                // APPROACH 1: Use direct cell access
+                const rows = [];
+                const columnCount = headers.length;
+                const lastIndexedColumn = Math.max(targetColumnIndex, rpcColumnIndex);
+
+                // Find all row elements in the grid
+                const rowElements = summaryGrid.querySelectorAll('.ag-row, [class*="ag-row"], [role="row"]');
+
+                // Skip the first row if it looks like a header row
+                const startIndex = rowElements.length > 0 && rowElements[0].classList.contains('ag-header-row') ? 1 : 0;
+
+                // Process each data row
+                for (let i = startIndex; i < rowElements.length; i++) {
+                    const rowElement = rowElements[i];
+
+                    // Skip if this is a header row
+                    if (rowElement.classList.contains('ag-header-row') || 
+                        rowElement.getAttribute('role') === 'columnheader') {
+                        continue;
                     }
-                }
-                
-                if (summaryGrid) {
-                    console.log('Found summary grid for extraction');
-                    
-                    // First identify the column headers to find Target and RPC columns
-                    const headerCells = summaryGrid.querySelectorAll('.ag-header-cell, [class*="header-cell"], [role="columnheader"]');
-                    
-                    // Extract header texts
-                    const headers = [];
-                    headerCells.forEach(cell => {
-                        const headerText = cell.textContent.trim();
-                        headers.push(headerText);
-                        
-                        // Track the indices of our target columns
-                        if (headerText === 'Target') {
-                            targetColumnIndex = headers.length - 1;
-                        } else if (headerText === 'RPC') {
-                            rpcColumnIndex = headers.length - 1;
+
+                    // Get cells in this row
+                    const cells = rowElement.querySelectorAll('.ag-cell, [class*="ag-cell"], [role="gridcell"]');
+
+                    // If Target and RPC column indices are known, use them directly
+                    if (targetColumnIndex >= 0 && rpcColumnIndex >= 0 && cells.length > lastIndexedColumn) {
+                        const targetText = cells[targetColumnIndex].textContent.trim();
+                        const rpcText = cells[rpcColumnIndex].textContent.trim();
+
+                        // Add this row if we got both values
+                        if (targetText && rpcText) {
+                            rows.push({
+                                Target: targetText,
+                                RPC: rpcText
+                            });
                         }
-                    });
-                    
-                    console.log(`Found headers: ${headers.join(', ')}`);
-                    console.log(`Target column index: ${targetColumnIndex}, RPC column index: ${rpcColumnIndex}`);
-                    
-                    // Try two approaches to get the cell data
-                    
-                    // APPROACH 1: Use direct cell access
-                    const rows = [];
-                    
-                    // Find all row elements in the grid
-                    const rowElements = summaryGrid.querySelectorAll('.ag-row, [class*="ag-row"], [role="row"]');
-                    
-                    // Skip the first row if it looks like a header row
-                    const startIndex = rowElements.length > 0 && rowElements[0].classList.contains('ag-header-row') ? 1 : 0;
-                    
-                    // Process each data row
-                    for (let i = startIndex; i < rowElements.length; i++) {
-                        const rowElement = rowElements[i];
-                        
-                        // Skip if this is a header row
-                        if (rowElement.classList.contains('ag-header-row') || 
-                            rowElement.getAttribute('role') === 'columnheader') {
-                            continue;
+                    } 
+                    // Otherwise try to map cells to headers
+                    else if (cells.length > 0 && columnCount > 0) {
+                        const rowData = {};
+                        const stop = Math.min(cells.length, columnCount);
+
+                        for (let j = 0; j < stop; j++) {
+                            rowData[headers[j]] = cells[j].textContent.trim();
                         }
-                        
-                        // Get cells in this row
-                        const cells = rowElement.querySelectorAll('.ag-cell, [class*="ag-cell"], [role="gridcell"]');
-                        
-                        // If Target and RPC column indices are known, use them directly
-                        if (targetColumnIndex >= 0 && rpcColumnIndex >= 0 && cells.length > Math.max(targetColumnIndex, rpcColumnIndex)) {
-                            const targetText = cells[targetColumnIndex].textContent.trim();
-                            const rpcText = cells[rpcColumnIndex].textContent.trim();
-                            
-                            // Add this row if we got both values
-                            if (targetText && rpcText) {
-                                rows.push({
-                                    Target: targetText,
-                                    RPC: rpcText
-                                });
-                            }
-                        } 
-                        // Otherwise try to map cells to headers
-                        else if (cells.length > 0 && headers.length > 0) {
-                            const rowData = {};
-                            
-                            for (let j = 0; j < Math.min(cells.length, headers.length); j++) {
-                                rowData[headers[j]] = cells[j].textContent.trim();
-                            }
-                            
-                            // Only add if we have Target data
-                            if (rowData.Target && (rowData.RPC || rowData.Revenue)) {
-                                rows.push(rowData);
-                            }
+
+                        // Only add if we have Target data
+                        if (rowData.Target && (rowData.RPC || rowData.Revenue)) {
+                            rows.push(rowData);
                         }
                     }
-                    
-                    // If we found rows, return them
-                    if (rows.length > 0) {
-                        console.log(`Extracted ${rows.length} rows from ag-Grid`);
-                        return { headers, rows };
+                }
+
+                // If we found rows, return them
+                if (rows.length > 0) {
+                    console.log(`Extracted ${rows.length} rows from ag-Grid`);
+                    return { headers, rows };
+                }
+
+                // APPROACH 2: Use cell position to find data values
+                // This works better with complex ag-Grid layouts with cell spans
+
+                // Find the exact positions of the Target and RPC column headers
+                let targetHeaderPosition = null;
+                let rpcHeaderPosition = null;
+
+                headerCells.forEach(cell => {
+                    const text = cell.textContent.trim();
+                    const rect = cell.getBoundingClientRect();
+
+                    if (text === 'Target') {
+                        targetHeaderPosition = {
+                            left: rect.left,
+                            width: rect.width,
+                            center: rect.left + rect.width / 2
+                        };
+                    } else if (text === 'RPC') {
+                        rpcHeaderPosition = {
+                            left: rect.left,
+                            width: rect.width,
+                            center: rect.left + rect.width / 2
+                        };
                     }
-                    
-                    // APPROACH 2: Use cell position to find data values
-                    // This works better with complex ag-Grid layouts with cell spans
-                    
-                    // Find the exact positions of the Target and RPC column headers
-                    let targetHeaderPosition = null;
-                    let rpcHeaderPosition = null;
-                    
-                    headerCells.forEach(cell => {
-                        const text = cell.textContent.trim();
+                });
+
+                // If we found position info for our columns
+                if (targetHeaderPosition && rpcHeaderPosition) {
+                    // Find all cell elements that could contain data (including those outside the grid)
+                    const allCells = document.querySelectorAll('.ag-cell, [class*="ag-cell"], .cell, td, [role="gridcell"]');
+
+                    // Group cells by their y-position to determine rows
+                    const cellsByRow = new Map();
+
+                    allCells.forEach(cell => {
                         const rect = cell.getBoundingClientRect();
-                        
-                        if (text === 'Target') {
-                            targetHeaderPosition = {
-                                left: rect.left,
-                                width: rect.width,
-                                center: rect.left + rect.width / 2
-                            };
-                        } else if (text === 'RPC') {
-                            rpcHeaderPosition = {
-                                left: rect.left,
-                                width: rect.width,
-                                center: rect.left + rect.width / 2
-                            };
+
+                        // Skip cells outside the grid area
+                        if (rect.top < 100) return; // Skip header areas
+
+                        // Group by y-position (rounded to handle slight offsets)
+                        const rowY = Math.round(rect.top / 5) * 5;
+
+                        let rowCells = cellsByRow.get(rowY);
+                        if (!rowCells) {
+                            rowCells = [];
+                            cellsByRow.set(rowY, rowCells);
                         }
+
+                        rowCells.push({
+                            element: cell,
+                            text: cell.textContent.trim(),
+                            left: rect.left,
+                            center: rect.left + rect.width / 2,
+                            width: rect.width
+                        });
                     });
-                    
-                    // If we found position info for our columns
-                    if (targetHeaderPosition && rpcHeaderPosition) {
-                        // Find all cell elements that could contain data (including those outside the grid)
-                        const allCells = document.querySelectorAll('.ag-cell, [class*="ag-cell"], .cell, td, [role="gridcell"]');
-                        
-                        // Group cells by their y-position to determine rows
-                        const cellsByRow = {};
-                        
-                        allCells.forEach(cell => {
-                            const rect = cell.getBoundingClientRect();
-                            
-                            // Skip cells outside the grid area
-                            if (rect.top < 100) return; // Skip header areas
-                            
-                            // Group by y-position (rounded to handle slight offsets)
-                            const rowY = Math.round(rect.top / 5) * 5;
-                            
-                            if (!cellsByRow[rowY]) {
-                                cellsByRow[rowY] = [];
-                            }
-                            
-                            cellsByRow[rowY].push({
-                                element: cell,
-                                text: cell.textContent.trim(),
-                                left: rect.left,
-                                center: rect.left + rect.width / 2,
-                                width: rect.width
+
+                    // Process each row of cells
+                    const positionRows = [];
+
+                    // Walk rows top to bottom (Maps iterate in insertion order, not key order)
+                    [...cellsByRow.keys()].sort((a, b) => a - b).forEach(rowY => {
+                        const rowCells = cellsByRow.get(rowY);
+                        // Find the cell most aligned with Target column
+                        const targetCell = rowCells.find(cell => 
+                            Math.abs(cell.center - targetHeaderPosition.center) < targetHeaderPosition.width / 2);
+
+                        // Find the cell most aligned with RPC column
+                        const rpcCell = rowCells.find(cell => 
+                            Math.abs(cell.center - rpcHeaderPosition.center) < rpcHeaderPosition.width / 2);
+
+                        // If we found both cells
+                        if (targetCell && rpcCell) {
+                            // Skip if either cell doesn't have text or RPC doesn't look like a dollar amount
+                            if (!targetCell.text || !rpcCell.text || !rpcCell.text.includes('$')) return;
+
+                            positionRows.push({
+                                Target: targetCell.text,
+                                RPC: rpcCell.text
                             });
-                        });
-                        
-                        // Process each row of cells
-                        const positionRows = [];
-                        
-                        Object.values(cellsByRow).forEach(rowCells => {
-                            // Find the cell most aligned with Target column
-                            const targetCell = rowCells.find(cell => 
-                                Math.abs(cell.center - targetHeaderPosition.center) < targetHeaderPosition.width / 2);
-                            
-                            // Find the cell most aligned with RPC column
-                            const rpcCell = rowCells.find(cell => 
-                                Math.abs(cell.center - rpcHeaderPosition.center) < rpcHeaderPosition.width / 2);
-                            
-                            // If we found both cells
-                            if (targetCell && rpcCell) {
-                                // Skip if either cell doesn't have text or RPC doesn't look like a dollar amount
-                                if (!targetCell.text || !rpcCell.text || !rpcCell.text.includes('$')) return;
-                                
-                                positionRows.push({
-                                    Target: targetCell.text,
-                                    RPC: rpcCell.text
-                                });
-                            }
-                        });
-                        
-                        if (positionRows.length > 0) {
-                            console.log(`Extracted ${positionRows.length} rows using position-based approach`);
-                            return {
-                                headers: ['Target', 'RPC'],
-                                rows: positionRows
-                            };
                         }
+                    });
+
+                    if (positionRows.length > 0) {
+                        console.log(`Extracted ${positionRows.length} rows using position-based approach`);
+                        return {
+                            headers: ['Target', 'RPC'],
+                            rows: positionRows
+                        };
                     }
                 }
-                
-                return null;
             }
-            
-            // Method to look for any visible table structure with Target and RPC columns
-            function findTableWithTargetAndRPC() {
-                // Check if there are any rows with target/RPC pairs visible in any part of the page
-                // Look specifically for dollar amounts which are likely RPC values
-                const dollarElements = Array.from(document.querySelectorAll('*'))
-                    .filter(el => {
-                        if (el.children.length > 0) return false;
-                        const text = el.textContent.trim();
-                        return text.startsWith('$') && /\\$\\d+(\\.\\d+)?/.test(text);
-                    });
-                
-                console.log(`Found ${dollarElements.length} dollar value elements`);
-                
-                // For each dollar value, attempt to find the corresponding Target value
-                const rows = [];
-                
-                dollarElements.forEach(dollarEl => {
-                    const dollarRect = dollarEl.getBoundingClientRect();
-                    const dollarValue = dollarEl.textContent.trim();
-                    
-                    // Skip headers or labels
-                    if (dollarValue === '$' || dollarValue === 'RPC' || dollarValue.includes('Threshold')) return;
-                    
-                    // Try to find the Target value in the same row (horizontally aligned)
-                    const sameRowElements = Array.from(document.querySelectorAll('*'))
-                        .filter(el => {
-                            if (el.children.length > 0) return false;
-                            const rect = el.getBoundingClientRect();
-                            const text = el.textContent.trim();
-                            
-                            // Skip if empty or too short
-                            if (!text || text.length < 2) return false;
-                            
-                            // Skip if it's another dollar value or column header
-                            if (text.startsWith('$') || text === 'Target' || text === 'RPC') return false;
-                            
-                            // Check if it's in the same horizontal line (within 10px)
-                            return Math.abs(rect.top - dollarRect.top) < 10;
-                        });
-                    
-                    if (sameRowElements.length > 0) {
-                        // Find the most likely Target element - typically to the left of the RPC value
-                        // Sort by x-position (left to right)
-                        sameRowElements.sort((a, b) => {
-                            return a.getBoundingClientRect().left - b.getBoundingClientRect().left;
+
+            return null;
+        }
+
+        // Method to look for any visible table structure with Target and RPC columns
+        function findTableWithTargetAndRPC() {
+            // Check if there are any rows with target/RPC pairs visible in any part of the page
+            // Walk the document once, sorting leaf elements into dollar amounts (likely RPC
+            // values) and possible Target labels, with their text and position read up front
+            const dollarElements = [];
+            const labelElements = [];
+            for (const el of document.querySelectorAll('*')) {
+                if (el.children.length > 0) continue;
+                const text = el.textContent.trim();
+                if (text.startsWith('$')) {
+                    if (/\\$\\d+(\\.\\d+)?/.test(text)) dollarElements.push({ text: text, rect: el.getBoundingClientRect() });
+                } else if (text.length >= 2 && text !== 'Target' && text !== 'RPC') {
+                    labelElements.push({ text: text, rect: el.getBoundingClientRect() });
+                }
+            }
+
+            console.log(`Found ${dollarElements.length} dollar value elements`);
+
+            // For each dollar value, attempt to find the corresponding Target value
+            const rows = [];
+
+            dollarElements.forEach(dollarEl => {
+                const dollarRect = dollarEl.rect;
+                const dollarValue = dollarEl.text;
+
+                // Skip headers or labels
+                if (dollarValue === '$' || dollarValue === 'RPC' || dollarValue.includes('Threshold')) return;
+
+                // Try to find the Target value in the same row (horizontally aligned, within 10px)
+                const sameRowElements = labelElements.filter(el => Math.abs(el.rect.top - dollarRect.top) < 10);
+
+                if (sameRowElements.length > 0) {
+                    // Find the most likely Target element - typically to the left of the RPC value
+                    // Sort by x-position (left to right)
+                    sameRowElements.sort((a, b) => a.rect.left - b.rect.left);
+
+                    // Look for elements to the left of the RPC value
+                    const elementsToLeft = sameRowElements.filter(el => el.rect.right < dollarRect.left);
+
+                    if (elementsToLeft.length > 0) {
+                        // The rightmost element to the left is typically the Target name
+                        const targetElement = elementsToLeft[elementsToLeft.length - 1];
+
+                        rows.push({
+                            Target: targetElement.text,
+                            RPC: dollarValue
                         });
-                        
-                        // Look for elements to the left of the RPC value
-                        const elementsToLeft = sameRowElements.filter(el => 
-                            el.getBoundingClientRect().right < dollarRect.left);
-                        
-                        if (elementsToLeft.length > 0) {
-                            // The rightmost element to the left is typically the Target name
-                            const targetElement = elementsToLeft[elementsToLeft.length - 1];
-                            
-                            rows.push({
-                                Target: targetElement.textContent.trim(),
-                                RPC: dollarValue
-                            });
-                        }
                     }
-                });
-                
-                if (rows.length > 0) {
-                    console.log(`Constructed ${rows.length} Target/RPC pairs from dollar values`);
-                    return {
-                        headers: ['Target', 'RPC'],
-                        rows: rows
-                    };
                 }
-                
-                return null;
+            });
+
+            if (rows.length > 0) {
+                console.log(`Constructed ${rows.length} Target/RPC pairs from dollar values`);
+                return {
+                    headers: ['Target', 'RPC'],
+                    rows: rows
+                };
             }
-            
-            // Try exact extraction from highlighted areas in screenshot
-            function extractHighlightedArea() {
-                // Look for all elements under headings "Target" and "RPC"
-                const targetHeader = Array.from(document.querySelectorAll('th, td, div, span'))
-                    .find(el => el.textContent.trim() === 'Target' && el.getBoundingClientRect().height < 50);
-                
-                const rpcHeader = Array.from(document.querySelectorAll('th, td, div, span'))
-                    .find(el => el.textContent.trim() === 'RPC' && el.getBoundingClientRect().height < 50);
-                
-                if (targetHeader && rpcHeader) {
-                    console.log('Found Target and RPC headers - using highlighted area extraction');
-                    
-                    // Get positions for these headers
-                    const targetHeaderRect = targetHeader.getBoundingClientRect();
-                    const rpcHeaderRect = rpcHeader.getBoundingClientRect();
-                    
-                    // Find elements that might be data cells vertically aligned below these headers
-                    const allElements = Array.from(document.querySelectorAll('*'))
-                        .filter(el => el.children.length === 0 && el.textContent.trim().length > 0)
-                        .map(el => {
-                            const rect = el.getBoundingClientRect();
-                            return {
-                                element: el,
-                                text: el.textContent.trim(),
-                                rect: rect
-                            };
-                        });
-                    
-                    // Group elements by their vertical position to represent rows
-                    const rowGroups = {};
-                    allElements.forEach(item => {
-                        // Skip the header elements themselves
-                        if (item.element === targetHeader || item.element === rpcHeader) return;
-                        
-                        // Skip if above the headers
-                        if (item.rect.top <= Math.max(targetHeaderRect.bottom, rpcHeaderRect.bottom)) return;
-                        
-                        // Group by vertical position (rounded to nearest 5px to handle slight variations)
-                        const rowKey = Math.round(item.rect.top / 5) * 5;
-                        if (!rowGroups[rowKey]) {
-                            rowGroups[rowKey] = [];
-                        }
-                        rowGroups[rowKey].push(item);
+
+            return null;
+        }
+
+        // Try exact extraction from highlighted areas in screenshot
+        function extractHighlightedArea() {
+            // Look for all elements under headings "Target" and "RPC"
+            // One pass over the candidates picks up both headers
+            let targetHeader = null;
+            let rpcHeader = null;
+            for (const el of document.querySelectorAll('th, td, div, span')) {
+                const text = el.textContent.trim();
+                if (text === 'Target') {
+                    if (!targetHeader && el.getBoundingClientRect().height < 50) targetHeader = el;
+                } else if (text === 'RPC') {
+                    if (!rpcHeader && el.getBoundingClientRect().height < 50) rpcHeader = el;
+                } else {
+                    continue;
+                }
+                if (targetHeader && rpcHeader) break;
+            }
+
+            if (targetHeader && rpcHeader) {
+                console.log('Found Target and RPC headers - using highlighted area extraction');
+
+                // Get positions for these headers
+                const targetHeaderRect = targetHeader.getBoundingClientRect();
+                const rpcHeaderRect = rpcHeader.getBoundingClientRect();
+
+                // Find elements that might be data cells vertically aligned below these headers
+                const allElements = Array.from(document.querySelectorAll('*'))
+                    .filter(el => el.children.length === 0 && el.textContent.trim().length > 0)
+                    .map(el => {
+                        const rect = el.getBoundingClientRect();
+                        return {
+                            element: el,
+                            text: el.textContent.trim(),
+                            rect: rect
+                        };
                     });
-                    
-                    // Process each row to extract Target and RPC pairs
-                    const rows = [];
-                    
-                    Object.values(rowGroups).forEach(rowItems => {
-                        let targetValue = null;
-                        let rpcValue = null;
-                        
-                        // Find a value horizontally aligned with the Target header
-                        const targetCandidates = rowItems.filter(item => {
+
+                // Group elements by their vertical position to represent rows
+                const rowGroups = new Map();
+                allElements.forEach(item => {
+                    // Skip the header elements themselves
+                    if (item.element === targetHeader || item.element === rpcHeader) return;
+
+                    // Skip if above the headers
+                    if (item.rect.top <= Math.max(targetHeaderRect.bottom, rpcHeaderRect.bottom)) return;
+
+                    // Group by vertical position (rounded to nearest 5px to handle slight variations)
+                    const rowKey = Math.round(item.rect.top / 5) * 5;
+                    let rowItems = rowGroups.get(rowKey);
+                    if (!rowItems) {
+                        rowItems = [];
+                        rowGroups.set(rowKey, rowItems);
+                    }
+                    rowItems.push(item);
+                });
+
+                // Process each row to extract Target and RPC pairs
+                const rows = [];
+
+                // Walk rows top to bottom (Maps iterate in insertion order, not key order)
+                [...rowGroups.keys()].sort((a, b) => a - b).forEach(rowKey => {
+                    const rowItems = rowGroups.get(rowKey);
+                    // A row needs at least a Target cell and an RPC cell
+                    if (rowItems.length < 2) return;
+
+                    let targetValue = null;
+                    let rpcValue = null;
+                    let targetDistance = Infinity;
+                    let rpcDistance = Infinity;
+
+                    // Find the values best aligned with the Target and RPC headers in one pass
+                    for (const item of rowItems) {
+                        if (!item.text.startsWith('$')) {
                             const alignedWithTarget = Math.abs(item.rect.left - targetHeaderRect.left) < targetHeaderRect.width / 2 ||
                                                      (item.rect.left > targetHeaderRect.left - 20 && 
                                                       item.rect.right < targetHeaderRect.right + 20);
-                            return alignedWithTarget && !item.text.startsWith('$');
-                        });
-                        
-                        if (targetCandidates.length > 0) {
-                            // Use the item best aligned with the Target header
-                            targetCandidates.sort((a, b) => {
-                                return Math.abs(a.rect.left - targetHeaderRect.left) - 
-                                       Math.abs(b.rect.left - targetHeaderRect.left);
-                            });
-                            targetValue = targetCandidates[0].text;
+                            const distance = Math.abs(item.rect.left - targetHeaderRect.left);
+                            if (alignedWithTarget && distance < targetDistance) {
+                                targetDistance = distance;
+                                targetValue = item.text;
+                            }
                         }
-                        
-                        // Find a value horizontally aligned with the RPC header
-                        const rpcCandidates = rowItems.filter(item => {
+
+                        if (item.text.includes('$')) {
                             const alignedWithRPC = Math.abs(item.rect.left - rpcHeaderRect.left) < rpcHeaderRect.width / 2 ||
                                                   (item.rect.left > rpcHeaderRect.left - 20 && 
                                                    item.rect.right < rpcHeaderRect.right + 20);
-                            return alignedWithRPC && item.text.includes('$');
-                        });
-                        
-                        if (rpcCandidates.length > 0) {
-                            // Use the item best aligned with the RPC header
-                            rpcCandidates.sort((a, b) => {
-                                return Math.abs(a.rect.left - rpcHeaderRect.left) - 
-                                       Math.abs(b.rect.left - rpcHeaderRect.left);
-                            });
-                            rpcValue = rpcCandidates[0].text;
-                        }
-                        
-                        // Add row if we found both values
-                        if (targetValue && rpcValue) {
-                            rows.push({
-                                Target: targetValue,
-                                RPC: rpcValue
-                            });
+                            const distance = Math.abs(item.rect.left - rpcHeaderRect.left);
+                            if (alignedWithRPC && distance < rpcDistance) {
+                                rpcDistance = distance;
+                                rpcValue = item.text;
+                            }
                         }
-                    });
-                    
-                    if (rows.length > 0) {
-                        console.log(`Extracted ${rows.length} rows from highlighted areas`);
-                        return {
-                            headers: ['Target', 'RPC'],
-                            rows: rows
-                        };
                     }
+
+                    // Add row if we found both values
+                    if (targetValue && rpcValue) {
+                        rows.push({
+                            Target: targetValue,
+                            RPC: rpcValue
+                        });
+                    }
+                });
+
+                if (rows.length > 0) {
+                    console.log(`Extracted ${rows.length} rows from highlighted areas`);
+                    return {
+                        headers: ['Target', 'RPC'],
+                        rows: rows
+                    };
                 }
-                
-                return null;
             }
-            
-            // Try each approach in sequence
-            console.log('Starting with ag-Grid extraction...');
-            let result = extractAgGridData();
-            
-            if (!result || !result.rows || result.rows.length === 0) {
-                console.log('ag-Grid extraction failed, trying highlighted area extraction...');
-                result = extractHighlightedArea();
-            }
-            
-            if (!result || !result.rows || result.rows.length === 0) {
-                console.log('Highlighted area extraction failed, trying dollar value extraction...');
-                result = findTableWithTargetAndRPC();
-            }
-            
-            if (!result || !result.rows || result.rows.length === 0) {
-                console.log('All specific extraction methods failed, trying original methods...');
-                
-                // Fall back to original extraction methods
-                function extractRingbaUI() {
-                    // Look for the "Summary" text/header on the page
-                    const summaryHeaders = Array.from(document.querySelectorAll('h1, h2, h3, h4, h5, h6, div'))
-                        .filter(el => el.textContent.trim() === 'Summary');
-                    
-                    console.log(`Found ${summaryHeaders.length} Summary headers`);
-                    
-                    // Look for the campaign/target/publisher column headers in ANY context
-                    const targetColumnTextContent = ['Campaign', 'Publisher', 'Target', 'Buyer', 'RPC', 'Revenue'];
-                    const columnHeaders = [];
-                    
-                    // Find all elements with these text contents
-                    targetColumnTextContent.forEach(text => {
-                        const elements = Array.from(document.querySelectorAll('*'))
-                            .filter(el => el.textContent.trim() === text);
-                        
-                        if (elements.length > 0) {
-                            console.log(`Found ${elements.length} elements with text "${text}"`);
-                            columnHeaders.push(...elements);
+
+            return null;
+        }
+
+        // Try each approach in sequence
+        console.log('Starting with ag-Grid extraction...');
+        let result = extractAgGridData();
+
+        if (!result || !result.rows || result.rows.length === 0) {
+            console.log('ag-Grid extraction failed, trying highlighted area extraction...');
+            result = extractHighlightedArea();
+        }
+
+        if (!result || !result.rows || result.rows.length === 0) {
+            console.log('Highlighted area extraction failed, trying dollar value extraction...');
+            result = findTableWithTargetAndRPC();
+        }
+
+        if (!result || !result.rows || result.rows.length === 0) {
+            console.log('All specific extraction methods failed, trying original methods...');
+
+            // Fall back to original extraction methods
+            function extractRingbaUI() {
+                // Look for the "Summary" text/header on the page
+                const summaryHeaders = Array.from(document.querySelectorAll('h1, h2, h3, h4, h5, h6, div'))
+                    .filter(el => el.textContent.trim() === 'Summary');
+
+                console.log(`Found ${summaryHeaders.length} Summary headers`);
+
+                // Look for the campaign/target/publisher column headers in ANY context
+                const targetColumnTextContent = ['Campaign', 'Publisher', 'Target', 'Buyer', 'RPC', 'Revenue'];
+                const columnHeaders = [];
+
+                // Find all elements with these text contents in a single document scan
+                const headersByText = new Map(targetColumnTextContent.map(text => [text, []]));
+                for (const el of document.querySelectorAll('*')) {
+                    const matches = headersByText.get(el.textContent.trim());
+                    if (matches) matches.push(el);
+                }
+                headersByText.forEach((elements, text) => {
+                    if (elements.length > 0) {
+                        console.log(`Found ${elements.length} elements with text "${text}"`);
+                        columnHeaders.push(...elements);
+                    }
+                });
+
+                // If we found column headers, try to find their parent table
+                if (columnHeaders.length > 0) {
+                    console.log(`Found ${columnHeaders.length} potential column headers`);
+
+                    // Group headers that are in the same container (likely the same row)
+                    const headerGroups = {};
+                    columnHeaders.forEach(header => {
+                        // Look for parent elements that might be a row or header container
+                        let parent = header.parentElement;
+                        let depth = 0;
+                        const maxDepth = 5; // Don't go too far up the tree
+
+                        while (parent && depth < maxDepth) {
+                            const key = parent.tagName + '|' + parent.className;
+                            if (!headerGroups[key]) {
+                                headerGroups[key] = { element: parent, headers: [] };
+                            }
+                            headerGroups[key].headers.push({
+                                element: header,
+                                text: header.textContent.trim()
+                            });
+                            parent = parent.parentElement;
+                            depth++;
                         }
                     });
-                    
-                    // If we found column headers, try to find their parent table
-                    if (columnHeaders.length > 0) {
-                        console.log(`Found ${columnHeaders.length} potential column headers`);
-                        
-                        // Group headers that are in the same container (likely the same row)
-                        const headerGroups = {};
-                        columnHeaders.forEach(header => {
-                            // Look for parent elements that might be a row or header container
-                            let parent = header.parentElement;
-                            let depth = 0;
-                            const maxDepth = 5; // Don't go too far up the tree
-                            
-                            while (parent && depth < maxDepth) {
-                                const key = parent.tagName + '|' + parent.className;
-                                if (!headerGroups[key]) {
-                                    headerGroups[key] = { element: parent, headers: [] };
-                                }
-                                headerGroups[key].headers.push({
-                                    element: header,
-                                    text: header.textContent.trim()
-                                });
-                                parent = parent.parentElement;
-                                depth++;
+
+                    // Find the parent with the most headers (likely the header row)
+                    let bestParent = null;
+                    let maxHeaders = 0;
+
+                    Object.values(headerGroups).forEach(group => {
+                        if (group.headers.length > maxHeaders) {
+                            maxHeaders = group.headers.length;
+                            bestParent = group.element;
+                        }
+                    });
+
+                    if (bestParent) {
+                        console.log(`Found header container with ${maxHeaders} headers`);
+
+                        // Try to find the table this header belongs to
+                        let tableElement = null;
+                        let parent = bestParent;
+                        let depth = 0;
+                        const maxDepth = 5;
+
+                        while (parent && depth < maxDepth) {
+                            if (parent.tagName === 'TABLE' || 
+                                parent.getAttribute('role') === 'grid' || 
+                                parent.getAttribute('role') === 'table') {
+                                tableElement = parent;
+                                break;
                             }
-                        });
-                        
-                        // Find the parent with the most headers (likely the header row)
-                        let bestParent = null;
-                        let maxHeaders = 0;
-                        
-                        Object.values(headerGroups).forEach(group => {
-                            if (group.headers.length > maxHeaders) {
-                                maxHeaders = group.headers.length;
-                                bestParent = group.element;
+
+                            // Also check if this element contains rows and cells
+                            const hasCells = parent.querySelectorAll('td, th, [role="cell"], [role="columnheader"]').length > 0;
+                            const hasRows = parent.querySelectorAll('tr, [role="row"]').length > 0;
+
+                            if (hasCells && hasRows) {
+                                tableElement = parent;
+                                break;
                             }
-                        });
-                        
-                        if (bestParent) {
-                            console.log(`Found header container with ${maxHeaders} headers`);
-                            
-                            // Try to find the table this header belongs to
-                            let tableElement = null;
-                            let parent = bestParent;
-                            let depth = 0;
-                            const maxDepth = 5;
-                            
-                            while (parent && depth < maxDepth) {
-                                if (parent.tagName === 'TABLE' || 
-                                    parent.getAttribute('role') === 'grid' || 
-                                    parent.getAttribute('role') === 'table') {
-                                    tableElement = parent;
-                                    break;
-                                }
-                                
-                                // Also check if this element contains rows and cells
-                                const hasCells = parent.querySelectorAll('td, th, [role="cell"], [role="columnheader"]').length > 0;
-                                const hasRows = parent.querySelectorAll('tr, [role="row"]').length > 0;
-                                
-                                if (hasCells && hasRows) {
-                                    tableElement = parent;
-                                    break;
-                                }
-                                
-                                parent = parent.parentElement;
-                                depth++;
+
+                            parent = parent.parentElement;
+                            depth++;
+                        }
+
+                        if (tableElement) {
+                            console.log('Found table element containing headers');
+
+                            // Extract all headers from this row
+                            const headerRow = bestParent;
+                            const headerCells = headerRow.querySelectorAll('th, td, div, span');
+                            const headers = Array.from(headerCells)
+                                .map(cell => cell.textContent.trim())
+                                .filter(text => text.length > 0);
+
+                            console.log('Extracted headers:', headers);
+
+                            // Find all rows that might contain data
+                            // 1. Look for siblings of the header row
+                            let dataRows = [];
+                            const siblings = [];
+                            let sibling = headerRow.nextElementSibling;
+
+                            while (sibling) {
+                                siblings.push(sibling);
+                                sibling = sibling.nextElementSibling;
+                            }
+
+                            if (siblings.length > 0) {
+                                console.log(`Found ${siblings.length} sibling rows`);
+                                dataRows = siblings;
+                            } else {
+                                // 2. Look for children of the table that are not the header row
+                                const allRows = tableElement.querySelectorAll('tr, [role="row"], div[class*="row"]');
+                                dataRows = Array.from(allRows).filter(row => row !== headerRow);
+                                console.log(`Found ${dataRows.length} potential data rows`);
                             }
-                            
-                            if (tableElement) {
-                                console.log('Found table element containing headers');
-                                
-                                // Extract all headers from this row
-                                const headerRow = bestParent;
-                                const headerCells = headerRow.querySelectorAll('th, td, div, span');
-                                const headers = Array.from(headerCells)
+
+                            // Extract data from rows
+                            const rows = [];
+                            const columnCount = headers.length;
+                            dataRows.forEach(row => {
+                                // Get all cells in this row
+                                const cells = row.querySelectorAll('td, [role="cell"], div, span');
+                                if (cells.length === 0) return;
+
+                                const rowData = {};
+                                const cellTexts = Array.from(cells)
                                     .map(cell => cell.textContent.trim())
                                     .filter(text => text.length > 0);
-                                
-                                console.log('Extracted headers:', headers);
-                                
-                                // Find all rows that might contain data
-                                // 1. Look for siblings of the header row
-                                let dataRows = [];
-                                const siblings = [];
-                                let sibling = headerRow.nextElementSibling;
-                                
-                                while (sibling) {
-                                    siblings.push(sibling);
-                                    sibling = sibling.nextElementSibling;
+
+                                // Map cell texts to headers
+                                const stop = Math.min(cellTexts.length, columnCount);
+                                for (let i = 0; i < stop; i++) {
+                                    rowData[headers[i]] = cellTexts[i];
                                 }
-                                
-                                if (siblings.length > 0) {
-                                    console.log(`Found ${siblings.length} sibling rows`);
-                                    dataRows = siblings;
-                                } else {
-                                    // 2. Look for children of the table that are not the header row
-                                    const allRows = tableElement.querySelectorAll('tr, [role="row"], div[class*="row"]');
-                                    dataRows = Array.from(allRows).filter(row => row !== headerRow);
-                                    console.log(`Found ${dataRows.length} potential data rows`);
+
+                                // Only include rows with sufficient data
+                                if (Object.keys(rowData).length >= 2) {
+                                    rows.push(rowData);
                                 }
-                                
-                                // Extract data from rows
-                                const rows = [];
-                                dataRows.forEach(row => {
-                                    // Get all cells in this row
-                                    const cells = row.querySelectorAll('td, [role="cell"], div, span');
-                                    if (cells.length === 0) return;
-                                    
-                                    const rowData = {};
-                                    const cellTexts = Array.from(cells)
-                                        .map(cell => cell.textContent.trim())
-                                        .filter(text => text.length > 0);
-                                    
-                                    // Map cell texts to headers
-                                    for (let i = 0; i < Math.min(cellTexts.length, headers.length); i++) {
-                                        rowData[headers[i]] = cellTexts[i];
-                                    }
-                                    
-                                    // Only include rows with sufficient data
-                                    if (Object.keys(rowData).length >= 2) {
-                                        rows.push(rowData);
-                                    }
-                                });
-                                
-                                console.log(`Extracted ${rows.length} data rows`);
-                                return { headers, rows };
-                            }
+                            });
+
+                            console.log(`Extracted ${rows.length} data rows`);
+                            return { headers, rows };
                         }
                     }
-                    
-                    return null;
-                }
-                
-                result = extractRingbaUI();
-            }
-            
-            return result || { headers: [], rows: [] };
-        """)
-        
-        # Check if we got data from the Ringba UI structure extraction
-        if ringba_structure_data and 'rows' in ringba_structure_data and ringba_structure_data['rows']:
-            logger.info(f"Successfully extracted {len(ringba_structure_data['rows'])} rows from Ringba UI structure")
-            
-            # Log the headers we found
-            if 'headers' in ringba_structure_data:
-                logger.info(f"Extracted headers: {ringba_structure_data['headers']}")
-            
-            # Convert to DataFrame
-            df = pd.DataFrame(ringba_structure_data['rows'])
-            
-            # Save to CSV file
-            file_path = os.path.join("/tmp", f"ringba_ui_extract_{int(time.time())}.csv")
-            df.to_csv(file_path, index=False)
-            
-            logger.info(f"Saved Ringba UI structure data to {file_path}")
-            return file_path
-        
-        # NEW ENHANCED VERSION: Directly extract from the table visible in the screenshot
-        logger.info("Extracting data directly from the visible Ringba summary table...")
-        table_data = browser.execute_script("""
-            console.log('Starting enhanced Ringba table extraction...');
-            
-            // APPROACH 1: Target the specific summary table at the bottom of the page
-            function extractRingbaSummaryTable() {
-                console.log('Attempting to extract from Ringba summary table');
-                
-                // First look for the table headers we can see in the screenshot
-                // Based on the visible headers in the screenshot: Campaign, Publisher, Target, Buyer, etc.
-                const TARGET_COLUMNS = ['Campaign', 'Publisher', 'Target', 'Buyer', 'Dialed #', 'Number Pool', 
-                                      'Date', 'Duplicate', 'Tags', 'RPC', 'Revenue', 'Payout'];
-                
-                // Check if we can find the header row
-                const headerElements = Array.from(document.querySelectorAll('th, [role="columnheader"]'));
-                console.log(`Found ${headerElements.length} potential header elements`);
-                
-                // Find header elements that match our target columns
-                const foundHeaders = headerElements.filter(el => {
-                    const text = el.textContent.trim().replace(/▼|▲|↓|↑/g, '').trim().toLowerCase();
-                    return TARGET_COLUMNS.some(col => col.toLowerCase() === text);
-                });
-                
-                console.log(`Found ${foundHeaders.length} matching header elements`);
-                
-                if (foundHeaders.length > 0) {
-                    // Find the table containing these headers
-                    const tableElement = foundHeaders[0].closest('table, [role="grid"], [role="table"]');
-                    
-                    if (tableElement) {
-                        console.log('Found table containing target headers');
-                        
-                        // Extract the header texts
-                        const headerRow = tableElement.querySelector('thead tr, [role="row"]') || 
-                                          tableElement.querySelector('tr:first-child');
-                        
-                        const headerCells = headerRow ? 
-                            headerRow.querySelectorAll('th, [role="columnheader"]') : 
-                            foundHeaders;
-                        
-                        const headers = Array.from(headerCells).map(cell => 
-                            cell.textContent.trim().replace(/▼|▲|↓|↑/g, '').trim());
-                        
-                        console.log('Extracted headers:', headers);
-                        
-                        // Find all data rows
-                        const dataRows = tableElement.querySelectorAll('tbody tr, [role="row"]:not([role="columnheader"])');
-                        console.log(`Found ${dataRows.length} data rows`);
-                        
-                        // Extract data from rows
-                        const rows = [];
-                        dataRows.forEach(row => {
-                            // Skip header rows
-                            if (row.querySelector('th') || row.closest('thead')) return;
-                            
-                            const cells = row.querySelectorAll('td, [role="cell"]');
-                            if (cells.length === 0) return;
-                            
-                            const rowData = {};
-                            for (let i = 0; i < Math.min(cells.length, headers.length); i++) {
-                                rowData[headers[i]] = cells[i].textContent.trim();
-                            }
-                            
-                            // Only include rows with meaningful data (not empty, not header repeats)
-                            const hasData = Object.values(rowData).some(val => 
-                                val && !headers.includes(val) && val !== 'Target' && val !== 'RPC');
-                                
-                            if (hasData) {
-                                rows.push(rowData);
-                            }
-                        });
-                        
-                        console.log(`Extracted ${rows.length} data rows with content`);
-                        return { headers, rows };
-                    }
                 }
-                
-                return null;
-            }
-            
-            // APPROACH 2: Target the specific section visible in the screenshot (Summary section)
-            function extractFromSummarySection() {
-                console.log('Looking for Summary section...');
-                
-                // Look for the Summary heading or section
-                const summarySection = document.querySelector('.summary, #summary, [data-test="summary"]');
-                const summaryHeading = Array.from(document.querySelectorAll('h1, h2, h3, h4, h5, h6'))
-                    .find(el => el.textContent.trim() === 'Summary');
-                
-                const summaryContext = summarySection || 
-                                      (summaryHeading && summaryHeading.parentElement) || 
-                                      document.querySelector('[id*="summary"], [class*="summary"]');
-                
-                if (summaryContext) {
-                    console.log('Found Summary section, looking for table within it');
-                    
-                    // Find table inside summary section
-                    const tableElement = summaryContext.querySelector('table, [role="grid"], [role="table"]');
-                    
-                    if (tableElement) {
-                        console.log('Found table in Summary section');
-                        
-                        // Extract headers
-                        const headers = [];
-                        const headerElements = tableElement.querySelectorAll('th, [role="columnheader"]');
-                        
-                        headerElements.forEach(el => {
-                            headers.push(el.textContent.trim().replace(/▼|▲|↓|↑/g, '').trim());
-                        });
-                        
-                        console.log('Found headers:', headers);
-                        
-                        // Extract data rows
-                        const rows = [];
-                        const dataRows = tableElement.querySelectorAll('tbody tr, [role="row"]:not([role="columnheader"])');
-                        
-                        dataRows.forEach(row => {
-                            const cells = row.querySelectorAll('td, [role="cell"]');
-                            if (cells.length === 0) return;
-                            
-                            const rowData = {};
-                            for (let i = 0; i < Math.min(cells.length, headers.length); i++) {
-                                rowData[headers[i]] = cells[i].textContent.trim();
-                            }
-                            
-                            rows.push(rowData);
-                        });
-                        
-                        console.log(`Extracted ${rows.length} rows from Summary section table`);
-                        return { headers, rows };
-                    }
-                }
-                
+
                 return null;
             }
-            
-            // APPROACH 3: Search for any table containing the key columns (Target, RPC)
-            function findTableWithTargetAndRPC() {
-                console.log('Searching for any table with Target and RPC columns...');
-                
-                const tables = document.querySelectorAll('table, [role="grid"], [role="table"]');
-                console.log(`Found ${tables.length} potential tables on page`);
-                
-                // Process each table
-                for (const table of tables) {
-                    // Get header elements
-                    const headerElements = table.querySelectorAll('th, [role="columnheader"]');
-                    if (headerElements.length === 0) continue;
-                    
-                    // Extract header texts
-                    const headers = Array.from(headerElements).map(el => 
-                        el.textContent.trim().replace(/▼|▲|↓|↑/g, '').trim());
-                    
-                    // Check if this table has both Target and RPC columns
-                    const hasTarget = headers.some(h => h === 'Target' || h === 'target');
-                    const hasRPC = headers.some(h => h === 'RPC' || h === 'rpc' || h.includes('Revenue'));
-                    
-                    if (hasTarget && hasRPC) {
-                        console.log('Found table with both Target and RPC columns');
-                        
-                        // Extract data rows
-                        const rows = [];
-                        const dataRows = table.querySelectorAll('tbody tr, [role="row"]:not([role="columnheader"])');
-                        
-                        dataRows.forEach(row => {
-                            const cells = row.querySelectorAll('td, [role="cell"]');
-                            if (cells.length === 0) return;
-                            
-                            const rowData = {};
-                            for (let i = 0; i < Math.min(cells.length, headers.length); i++) {
-                                rowData[headers[i]] = cells[i].textContent.trim();
-                            }
-                            
+
+            result = extractRingbaUI();
+        }
+
+        return result || { headers: [], rows: [] };
+    },
+    
+    // Extraction from the visible summary table
+    extractTable: function() {
+        console.log('Starting enhanced Ringba table extraction...');
+
+        // APPROACH 1: Target the specific summary table at the bottom of the page
+        function extractRingbaSummaryTable() {
+            console.log('Attempting to extract from Ringba summary table');
+
+            // First look for the table headers we can see in the screenshot
+            // Based on the visible headers in the screenshot: Campaign, Publisher, Target, Buyer, etc.
+            const TARGET_COLUMNS = ['Campaign', 'Publisher', 'Target', 'Buyer', 'Dialed #', 'Number Pool', 
+                                  'Date', 'Duplicate', 'Tags', 'RPC', 'Revenue', 'Payout'];
+
+            // Check if we can find the header row
+            const headerElements = Array.from(document.querySelectorAll('th, [role="columnheader"]'));
+            console.log(`Found ${headerElements.length} potential header elements`);
+
+            // Find header elements that match our target columns
+            const foundHeaders = headerElements.filter(el => {
+                const text = el.textContent.trim().replace(/▼|▲|↓|↑/g, '').trim().toLowerCase();
+                return TARGET_COLUMNS.some(col => col.toLowerCase() === text);
+            });
+
+            console.log(`Found ${foundHeaders.length} matching header elements`);
+
+            if (foundHeaders.length > 0) {
+                // Find the table containing these headers
+                const tableElement = foundHeaders[0].closest('table, [role="grid"], [role="table"]');
+
+                if (tableElement) {
+                    console.log('Found table containing target headers');
+
+                    // Extract the header texts
+                    const headerRow = tableElement.querySelector('thead tr, [role="row"]') || 
+                                      tableElement.querySelector('tr:first-child');
+
+                    const headerCells = headerRow ? 
+                        headerRow.querySelectorAll('th, [role="columnheader"]') : 
+                        foundHeaders;
+
+                    const headers = Array.from(headerCells).map(cell => 
+                        cell.textContent.trim().replace(/▼|▲|↓|↑/g, '').trim());
+
+                    console.log('Extracted headers:', headers);
+
+                    // Find all data rows
+                    const dataRows = tableElement.querySelectorAll('tbody tr, [role="row"]:not([role="columnheader"])');
+                    console.log(`Found ${dataRows.length} data rows`);
+
+                    // Extract data from rows
+                    const rows = [];
+                    const columnCount = headers.length;
+                    dataRows.forEach(row => {
+                        // Skip header rows
+                        if (row.querySelector('th') || row.closest('thead')) return;
+
+                        const cells = row.querySelectorAll('td, [role="cell"]');
+                        if (cells.length === 0) return;
+
+                        const rowData = {};
+                        const stop = Math.min(cells.length, columnCount);
+                        for (let i = 0; i < stop; i++) {
+                            rowData[headers[i]] = cells[i].textContent.trim();
+                        }
+
+                        // Only include rows with meaningful data (not empty, not header repeats)
+                        const hasData = Object.values(rowData).some(val => 
+                            val && !headers.includes(val) && val !== 'Target' && val !== 'RPC');
+
+                        if (hasData) {
                             rows.push(rowData);
-                        });
-                        
-                        console.log(`Extracted ${rows.length} rows from table with Target and RPC`);
-                        return { headers, rows };
-                    }
+                        }
+                    });
+
+                    console.log(`Extracted ${rows.length} data rows with content`);
+                    return { headers, rows };
                 }
-                
-                return null;
             }
-            
-            // APPROACH 4: Position-based extraction for complex Angular/React tables
-            function extractByPosition() {
-                console.log('Attempting position-based extraction for complex tables...');
-                
-                // First try to find the Target and RPC column headers
-                const columnHeaders = Array.from(document.querySelectorAll('div, span, th, [role="columnheader"]'))
-                    .filter(el => {
-                        const text = el.textContent.trim().toLowerCase();
-                        return text === 'target' || text === 'rpc' || text === 'campaign' || 
-                               text === 'revenue' || text === 'publisher';
-                    });
-                
-                if (columnHeaders.length >= 2) {
-                    console.log(`Found ${columnHeaders.length} column headers including Target/RPC`);
-                    
-                    // Get the positions of these headers
-                    const headerPositions = columnHeaders.map(el => {
-                        const rect = el.getBoundingClientRect();
-                        return {
-                            element: el,
-                            text: el.textContent.trim(),
-                            x: rect.left,
-                            y: rect.top,
-                            width: rect.width,
-                            bottom: rect.bottom
-                        };
+
+            return null;
+        }
+
+        // APPROACH 2: Target the specific section visible in the screenshot (Summary section)
+        function extractFromSummarySection() {
+            console.log('Looking for Summary section...');
+
+            // Look for the Summary heading or section
+            const summarySection = document.querySelector('.summary, #summary, [data-test="summary"]');
+            const summaryHeading = Array.from(document.querySelectorAll('h1, h2, h3, h4, h5, h6'))
+                .find(el => el.textContent.trim() === 'Summary');
+
+            const summaryContext = summarySection || 
+                                  (summaryHeading && summaryHeading.parentElement) || 
+                                  document.querySelector('[id*="summary"], [class*="summary"]');
+
+            if (summaryContext) {
+                console.log('Found Summary section, looking for table within it');
+
+                // Find table inside summary section
+                const tableElement = summaryContext.querySelector('table, [role="grid"], [role="table"]');
+
+                if (tableElement) {
+                    console.log('Found table in Summary section');
+
+                    // Extract headers
+                    const headers = [];
+                    const headerElements = tableElement.querySelectorAll('th, [role="columnheader"]');
+
+                    headerElements.forEach(el => {
+                        headers.push(el.textContent.trim().replace(/▼|▲|↓|↑/g, '').trim());
                     });
-                    
-                    // Sort headers by Y position to group headers in the same row
-                    const headersByRow = {};
-                    headerPositions.forEach(pos => {
-                        // Round Y position to group headers in the same row
-                        const rowY = Math.round(pos.y / 5) * 5;
-                        if (!headersByRow[rowY]) {
-                            headersByRow[rowY] = [];
+
+                    console.log('Found headers:', headers);
+
+                    // Extract data rows
+                    const rows = [];
+                    const columnCount = headers.length;
+                    const dataRows = tableElement.querySelectorAll('tbody tr, [role="row"]:not([role="columnheader"])');
+
+                    dataRows.forEach(row => {
+                        const cells = row.querySelectorAll('td, [role="cell"]');
+                        if (cells.length === 0) return;
+
+                        const rowData = {};
+                        const stop = Math.min(cells.length, columnCount);
+                        for (let i = 0; i < stop; i++) {
+                            rowData[headers[i]] = cells[i].textContent.trim();
                         }
-                        headersByRow[rowY].push(pos);
+
+                        rows.push(rowData);
                     });
-                    
-                    // Use the row with the most column headers
-                    let bestHeaderRow = null;
-                    let maxHeaders = 0;
-                    
-                    Object.entries(headersByRow).forEach(([rowY, headers]) => {
-                        if (headers.length > maxHeaders) {
-                            maxHeaders = headers.length;
-                            bestHeaderRow = headers;
+
+                    console.log(`Extracted ${rows.length} rows from Summary section table`);
+                    return { headers, rows };
+                }
+            }
+
+            return null;
+        }
+
+        // APPROACH 3: Search for any table containing the key columns (Target, RPC)
+        function findTableWithTargetAndRPC() {
+            console.log('Searching for any table with Target and RPC columns...');
+
+            const tables = document.querySelectorAll('table, [role="grid"], [role="table"]');
+            console.log(`Found ${tables.length} potential tables on page`);
+
+            // Process each table
+            for (const table of tables) {
+                // Get header elements
+                const headerElements = table.querySelectorAll('th, [role="columnheader"]');
+                if (headerElements.length === 0) continue;
+
+                // Extract header texts
+                const headers = Array.from(headerElements).map(el => 
+                    el.textContent.trim().replace(/▼|▲|↓|↑/g, '').trim());
+
+                // Check if this table has both Target and RPC columns
+                const hasTarget = headers.some(h => h === 'Target' || h === 'target');
+                const hasRPC = headers.some(h => h === 'RPC' || h === 'rpc' || h.includes('Revenue'));
+
+                if (hasTarget && hasRPC) {
+                    console.log('Found table with both Target and RPC columns');
+
+                    // Extract data rows
+                    const rows = [];
+                    const columnCount = headers.length;
+                    const dataRows = table.querySelectorAll('tbody tr, [role="row"]:not([role="columnheader"])');
+
+                    dataRows.forEach(row => {
+                        const cells = row.querySelectorAll('td, [role="cell"]');
+                        if (cells.length === 0) return;
+
+                        const rowData = {};
+                        const stop = Math.min(cells.length, columnCount);
+                        for (let i = 0; i < stop; i++) {
+                            rowData[headers[i]] = cells[i].textContent.trim();
                         }
+
+                        rows.push(rowData);
                     });
-                    
-                    if (bestHeaderRow) {
-                        // Sort headers by X position (left to right)
-                        bestHeaderRow.sort((a, b) => a.x - b.x);
-                        
-                        // Extract header names
-                        const headers = bestHeaderRow.map(h => h.text);
-                        console.log('Found headers by position:', headers);
-                        
-                        // Get the Y position below the header row where data starts
-                        const dataStartY = Math.max(...bestHeaderRow.map(h => h.bottom)) + 5;
-                        
-                        // Find all text elements that could be cell data
-                        const allCellTexts = Array.from(document.querySelectorAll('div, span'))
-                            .filter(el => {
-                                // Skip elements with children (containers)
-                                if (el.children.length > 0) return false;
-                                
-                                // Must have text content
-                                if (!el.textContent.trim()) return false;
-                                
-                                // Get position
-                                const rect = el.getBoundingClientRect();
-                                
-                                // Must be below the headers
-                                return rect.top >= dataStartY;
-                            })
-                            .map(el => {
-                                const rect = el.getBoundingClientRect();
-                                return {
-                                    element: el,
-                                    text: el.textContent.trim(),
-                                    x: rect.left,
-                                    y: rect.top
-                                };
-                            });
-                        
-                        // Group cells by row position
-                        const cellsByRow = {};
-                        allCellTexts.forEach(cell => {
-                            // Round Y position to group cells in the same row
-                            const rowY = Math.round(cell.y / 5) * 5;
-                            if (!cellsByRow[rowY]) {
-                                cellsByRow[rowY] = [];
-                            }
-                            cellsByRow[rowY].push(cell);
-                        });
-                        
-                        // Process each row to create data records
-                        const rows = [];
-                        Object.entries(cellsByRow).forEach(([rowY, cells]) => {
-                            // Skip if this might be the header row
-                            if (Math.abs(parseInt(rowY) - Math.round(bestHeaderRow[0].y / 5) * 5) < 10) {
-                                return;
-                            }
-                            
-                            // Sort cells by X position
-                            cells.sort((a, b) => a.x - b.x);
-                            
-                            // Map cells to headers based on X position
-                            const rowData = {};
-                            bestHeaderRow.forEach((header, index) => {
-                                // Find the cell that best matches this header's X position
-                                const nearestCells = cells.filter(cell => 
-                                    Math.abs(cell.x - header.x) < header.width * 0.8);
-                                
-                                if (nearestCells.length > 0) {
-                                    // Use the nearest cell by X position
-                                    nearestCells.sort((a, b) => 
-                                        Math.abs(a.x - header.x) - Math.abs(b.x - header.x));
-                                    
-                                    rowData[header.text] = nearestCells[0].text;
-                                }
-                            });
-                            
-                            // Only include rows with reasonable data
-                            if (Object.keys(rowData).length >= 2) {
-                                rows.push(rowData);
-                            }
-                        });
-                        
-                        console.log(`Extracted ${rows.length} rows using position-based approach`);
-                        return { headers, rows };
-                    }
+
+                    console.log(`Extracted ${rows.length} rows from table with Target and RPC`);
+                    return { headers, rows };
                 }
-                
-                return null;
             }
-            
-            // APPROACH 5: Direct DOM scraping for dollar values and labels
-            function extractDollarValuesAndLabels() {
-                console.log('Extracting dollar values and their labels directly...');
-                
-                // Find all elements with $ sign that might be RPC values
-                const dollarElements = Array.from(document.querySelectorAll('*'))
-                    .filter(el => {
-                        // Skip containers
-                        if (el.children.length > 0) return false;
-                        
-                        const text = el.textContent.trim();
-                        // Must start with $ and look like a currency value
-                        return text.startsWith('$') && /\\$\\d+(\\.\\d+)?/.test(text);
-                    });
-                
-                console.log(`Found ${dollarElements.length} dollar value elements`);
-                
-                // Find the nearest label for each dollar value
-                const results = [];
-                dollarElements.forEach(dollarEl => {
-                    const dollarRect = dollarEl.getBoundingClientRect();
-                    const dollarValue = dollarEl.textContent.trim();
-                    
-                    // Find all elements that could be labels
-                    const potentialLabels = Array.from(document.querySelectorAll('*'))
+
+            return null;
+        }
+
+        // APPROACH 4: Position-based extraction for complex Angular/React tables
+        function extractByPosition() {
+            console.log('Attempting position-based extraction for complex tables...');
+
+            // First try to find the Target and RPC column headers
+            const columnHeaders = Array.from(document.querySelectorAll('div, span, th, [role="columnheader"]'))
+                .filter(el => {
+                    const text = el.textContent.trim().toLowerCase();
+                    return text === 'target' || text === 'rpc' || text === 'campaign' || 
+                           text === 'revenue' || text === 'publisher';
+                });
+
+            if (columnHeaders.length >= 2) {
+                console.log(`Found ${columnHeaders.length} column headers including Target/RPC`);
+
+                // Get the positions of these headers
+                const headerPositions = columnHeaders.map(el => {
+                    const rect = el.getBoundingClientRect();
+                    return {
+                        element: el,
+                        text: el.textContent.trim(),
+                        x: rect.left,
+                        y: rect.top,
+                        width: rect.width,
+                        bottom: rect.bottom
+                    };
+                });
+
+                // Sort headers by Y position to group headers in the same row
+                const headersByRow = new Map();
+                headerPositions.forEach(pos => {
+                    // Round Y position to group headers in the same row
+                    const rowY = Math.round(pos.y / 5) * 5;
+                    let rowHeaders = headersByRow.get(rowY);
+                    if (!rowHeaders) {
+                        rowHeaders = [];
+                        headersByRow.set(rowY, rowHeaders);
+                    }
+                    rowHeaders.push(pos);
+                });
+
+                // Use the row with the most column headers
+                let bestHeaderRow = null;
+                let maxHeaders = 0;
+
+                // Check rows top to bottom so the topmost row wins ties
+                [...headersByRow.keys()].sort((a, b) => a - b).forEach(rowY => {
+                    const headers = headersByRow.get(rowY);
+                    if (headers.length > maxHeaders) {
+                        maxHeaders = headers.length;
+                        bestHeaderRow = headers;
+                    }
+                });
+
+                if (bestHeaderRow) {
+                    // Sort headers by X position (left to right)
+                    bestHeaderRow.sort((a, b) => a.x - b.x);
+
+                    // Extract header names
+                    const headers = bestHeaderRow.map(h => h.text);
+                    console.log('Found headers by position:', headers);
+
+                    // Get the Y position below the header row where data starts
+                    const dataStartY = Math.max(...bestHeaderRow.map(h => h.bottom)) + 5;
+
+                    // Find all text elements that could be cell data
+                    const allCellTexts = Array.from(document.querySelectorAll('div, span'))
                         .filter(el => {
-                            // Skip containers
+                            // Skip elements with children (containers)
                             if (el.children.length > 0) return false;
-                            
-                            // Skip dollars
-                            if (el.textContent.trim().startsWith('$')) return false;
-                            
+
                             // Must have text content
-                            const text = el.textContent.trim();
-                            if (!text || text.length < 2) return false;
-                            
-                            // Position relative to dollar value
+                            if (!el.textContent.trim()) return false;
+
+                            // Get position
                             const rect = el.getBoundingClientRect();
-                            
-                            // Either same row (to the left) or row above
-                            const sameRow = Math.abs(rect.top - dollarRect.top) < 10 && rect.left < dollarRect.left;
-                            const rowAbove = dollarRect.top - rect.bottom < 30 && dollarRect.top - rect.bottom > 5 &&
-                                          Math.abs(rect.left - dollarRect.left) < 50;
-                            
-                            return sameRow || rowAbove;
+
+                            // Must be below the headers
+                            return rect.top >= dataStartY;
+                        })
+                        .map(el => {
+                            const rect = el.getBoundingClientRect();
+                            return {
+                                element: el,
+                                text: el.textContent.trim(),
+                                x: rect.left,
+                                y: rect.top
+                            };
                         });
-                    
-                    if (potentialLabels.length > 0) {
-                        // Sort by distance (prefer same row, then closest)
-                        potentialLabels.sort((a, b) => {
-                            const aRect = a.getBoundingClientRect();
-                            const bRect = b.getBoundingClientRect();
-                            
-                            // Same row has priority
-                            const aOnSameRow = Math.abs(aRect.top - dollarRect.top) < 10;
-                            const bOnSameRow = Math.abs(bRect.top - dollarRect.top) < 10;
-                            
-                            if (aOnSameRow && !bOnSameRow) return -1;
-                            if (!aOnSameRow && bOnSameRow) return 1;
-                            
-                            // Both on same row - compare horizontal distance
-                            if (aOnSameRow && bOnSameRow) {
-                                return (dollarRect.left - aRect.right) - (dollarRect.left - bRect.right);
+
+                    // Group cells by row position
+                    const cellsByRow = new Map();
+                    allCellTexts.forEach(cell => {
+                        // Round Y position to group cells in the same row
+                        const rowY = Math.round(cell.y / 5) * 5;
+                        let rowCells = cellsByRow.get(rowY);
+                        if (!rowCells) {
+                            rowCells = [];
+                            cellsByRow.set(rowY, rowCells);
+                        }
+                        rowCells.push(cell);
+                    });
+
+                    // Process each row to create data records
+                    const rows = [];
+                    const headerRowY = Math.round(bestHeaderRow[0].y / 5) * 5;
+                    // Walk rows top to bottom (Maps iterate in insertion order, not key order)
+                    [...cellsByRow.keys()].sort((a, b) => a - b).forEach(rowY => {
+                        const cells = cellsByRow.get(rowY);
+                        // Skip rows that can never reach two mapped columns, and the header row itself
+                        if (cells.length < 2 || Math.abs(rowY - headerRowY) < 10) {
+                            return;
+                        }
+
+                        // Map cells to headers based on X position
+                        const rowData = {};
+                        bestHeaderRow.forEach(header => {
+                            // Find the cell nearest to this header's X position in a single pass
+                            const maxDistance = header.width * 0.8;
+                            let nearestCell = null;
+                            let nearestDistance = Infinity;
+
+                            for (const cell of cells) {
+                                const distance = Math.abs(cell.x - header.x);
+                                if (distance < maxDistance && distance < nearestDistance) {
+                                    nearestDistance = distance;
+                                    nearestCell = cell;
+                                }
                             }
-                            
-                            // Both on different rows - compare vertical then horizontal distance
-                            const aVertDist = dollarRect.top - aRect.bottom;
-                            const bVertDist = dollarRect.top - bRect.bottom;
-                            
-                            if (Math.abs(aVertDist - bVertDist) > 10) {
-                                return aVertDist - bVertDist;
+
+                            if (nearestCell) {
+                                rowData[header.text] = nearestCell.text;
                             }
-                            
-                            return Math.abs(aRect.left - dollarRect.left) - Math.abs(bRect.left - dollarRect.left);
-                        });
-                        
-                        const bestLabel = potentialLabels[0];
-                        results.push({
-                            Target: bestLabel.textContent.trim(),
-                            RPC: dollarValue
                         });
-                    }
-                });
-                
-                console.log(`Constructed ${results.length} Target/RPC pairs`);
-                return { 
-                    headers: ['Target', 'RPC'],
-                    rows: results 
-                };
-            }
-            
-            // Try each approach in order
-            let result = extractRingbaSummaryTable();
-            
-            if (!result || !result.rows || result.rows.length === 0) {
-                console.log('First approach failed, trying Summary section approach...');
-                result = extractFromSummarySection();
-            }
-            
-            if (!result || !result.rows || result.rows.length === 0) {
-                console.log('Second approach failed, searching for Target/RPC table...');
-                result = findTableWithTargetAndRPC();
-            }
-            
-            if (!result || !result.rows || result.rows.length === 0) {
-                console.log('Third approach failed, trying position-based extraction...');
-                result = extractByPosition();
+
+                        // Only include rows with reasonable data
+                        if (Object.keys(rowData).length >= 2) {
+                            rows.push(rowData);
+                        }
+                    });
+
+                    console.log(`Extracted ${rows.length} rows using position-based approach`);
+                    return { headers, rows };
+                }
             }
-            
-            if (!result || !result.rows || result.rows.length === 0) {
-                console.log('Fourth approach failed, extracting dollar values directly...');
-                result = extractDollarValuesAndLabels();
+
+            return null;
+        }
+
+        // APPROACH 5: Direct DOM scraping for dollar values and labels
+        function extractDollarValuesAndLabels() {
+            console.log('Extracting dollar values and their labels directly...');
+
+            // Walk the document once, sorting leaf elements into dollar amounts that might be
+            // RPC values and possible labels, with their text and position read up front
+            const dollarElements = [];
+            const labelElements = [];
+            for (const el of document.querySelectorAll('*')) {
+                // Skip containers
+                if (el.children.length > 0) continue;
+
+                const text = el.textContent.trim();
+                if (text.startsWith('$')) {
+                    // Must look like a currency value
+                    if (/\\$\\d+(\\.\\d+)?/.test(text)) dollarElements.push({ text: text, rect: el.getBoundingClientRect() });
+                } else if (text.length >= 2) {
+                    labelElements.push({ text: text, rect: el.getBoundingClientRect() });
+                }
             }
-            
-            // Extract relevant columns only (Target and RPC)
-            if (result && result.rows && result.rows.length > 0) {
-                // Check which columns are available
-                const sampleRow = result.rows[0];
-                
-                let targetColumn = null;
-                let rpcColumn = null;
-                
-                // Find Target column
-                if ('Target' in sampleRow) targetColumn = 'Target';
-                else if ('target' in sampleRow) targetColumn = 'target';
-                else {
-                    // Look for columns containing "target" (case insensitive)
-                    for (const col in sampleRow) {
-                        if (col.toLowerCase().includes('target')) {
-                            targetColumn = col;
-                            break;
+
+            console.log(`Found ${dollarElements.length} dollar value elements`);
+
+            // Find the nearest label for each dollar value
+            const results = [];
+            dollarElements.forEach(dollarEl => {
+                const dollarRect = dollarEl.rect;
+                const dollarValue = dollarEl.text;
+
+                // Labels are either on the same row (to the left) or in the row above
+                const potentialLabels = labelElements.filter(el => {
+                    const rect = el.rect;
+                    const sameRow = Math.abs(rect.top - dollarRect.top) < 10 && rect.left < dollarRect.left;
+                    const rowAbove = dollarRect.top - rect.bottom < 30 && dollarRect.top - rect.bottom > 5 &&
+                                  Math.abs(rect.left - dollarRect.left) < 50;
+
+                    return sameRow || rowAbove;
+                });
+
+                if (potentialLabels.length > 0) {
+                    // Sort by distance (prefer same row, then closest)
+                    potentialLabels.sort((a, b) => {
+                        const aRect = a.rect;
+                        const bRect = b.rect;
+
+                        // Same row has priority
+                        const aOnSameRow = Math.abs(aRect.top - dollarRect.top) < 10;
+                        const bOnSameRow = Math.abs(bRect.top - dollarRect.top) < 10;
+
+                        if (aOnSameRow && !bOnSameRow) return -1;
+                        if (!aOnSameRow && bOnSameRow) return 1;
+
+                        // Both on same row - compare horizontal distance
+                        if (aOnSameRow && bOnSameRow) {
+                            return (dollarRect.left - aRect.right) - (dollarRect.left - bRect.right);
                         }
+
+                        // Both on different rows - compare vertical then horizontal distance
+                        const aVertDist = dollarRect.top - aRect.bottom;
+                        const bVertDist = dollarRect.top - bRect.bottom;
+
+                        if (Math.abs(aVertDist - bVertDist) > 10) {
+                            return aVertDist - bVertDist;
+                        }
+
+                        return Math.abs(aRect.left - dollarRect.left) - Math.abs(bRect.left - dollarRect.left);
+                    });
+
+                    const bestLabel = potentialLabels[0];
+                    results.push({
+                        Target: bestLabel.text,
+                        RPC: dollarValue
+                    });
+                }
+            });
+
+            console.log(`Constructed ${results.length} Target/RPC pairs`);
+            return { 
+                headers: ['Target', 'RPC'],
+                rows: results 
+            };
+        }
+
+        // Try each approach in order
+        let result = extractRingbaSummaryTable();
+
+        if (!result || !result.rows || result.rows.length === 0) {
+            console.log('First approach failed, trying Summary section approach...');
+            result = extractFromSummarySection();
+        }
+
+        if (!result || !result.rows || result.rows.length === 0) {
+            console.log('Second approach failed, searching for Target/RPC table...');
+            result = findTableWithTargetAndRPC();
+        }
+
+        if (!result || !result.rows || result.rows.length === 0) {
+            console.log('Third approach failed, trying position-based extraction...');
+            result = extractByPosition();
+        }
+
+        if (!result || !result.rows || result.rows.length === 0) {
+            console.log('Fourth approach failed, extracting dollar values directly...');
+            result = extractDollarValuesAndLabels();
+        }
+
+        // Extract relevant columns only (Target and RPC)
+        if (result && result.rows && result.rows.length > 0) {
+            // Check which columns are available
+            const sampleRow = result.rows[0];
+
+            let targetColumn = null;
+            let rpcColumn = null;
+
+            // Find Target column
+            if ('Target' in sampleRow) targetColumn = 'Target';
+            else if ('target' in sampleRow) targetColumn = 'target';
+            else {
+                // Look for columns containing "target" (case insensitive)
+                for (const col in sampleRow) {
+                    if (col.toLowerCase().includes('target')) {
+                        targetColumn = col;
+                        break;
                     }
                 }
-                
-                // Find RPC column
-                if ('RPC' in sampleRow) rpcColumn = 'RPC';
-                else if ('rpc' in sampleRow) rpcColumn = 'rpc';
-                else {
-                    // Look for columns with $ values
+            }
+
+            // Find RPC column
+            if ('RPC' in sampleRow) rpcColumn = 'RPC';
+            else if ('rpc' in sampleRow) rpcColumn = 'rpc';
+            else {
+                // Look for columns with $ values
+                for (const col in sampleRow) {
+                    if (typeof sampleRow[col] === 'string' && sampleRow[col].includes('$')) {
+                        rpcColumn = col;
+                        break;
+                    }
+                }
+
+                // Look for columns containing "rpc" or "revenue" (case insensitive)
+                if (!rpcColumn) {
                     for (const col in sampleRow) {
-                        if (typeof sampleRow[col] === 'string' && sampleRow[col].includes('$')) {
+                        if (col.toLowerCase().includes('rpc') || col.toLowerCase().includes('revenue')) {
                             rpcColumn = col;
                             break;
                         }
                     }
-                    
-                    // Look for columns containing "rpc" or "revenue" (case insensitive)
-                    if (!rpcColumn) {
-                        for (const col in sampleRow) {
-                            if (col.toLowerCase().includes('rpc') || col.toLowerCase().includes('revenue')) {
-                                rpcColumn = col;
-                                break;
-                            }
-                        }
-                    }
                 }
-                
-                // If we found both columns, extract only those
-                if (targetColumn && rpcColumn) {
-                    console.log(`Extracting from columns: Target=${targetColumn}, RPC=${rpcColumn}`);
-                    
-                    const simplifiedRows = result.rows.map(row => ({
-                        Target: row[targetColumn],
-                        RPC: row[rpcColumn]
-                    }));
-                    
-                    return {
-                        headers: ['Target', 'RPC'],
-                        rows: simplifiedRows
-                    };
+            }
+
+            // If we found both columns, extract only those
+            if (targetColumn && rpcColumn) {
+                console.log(`Extracting from columns: Target=${targetColumn}, RPC=${rpcColumn}`);
+
+                const simplifiedRows = result.rows.map(row => ({
+                    Target: row[targetColumn],
+                    RPC: row[rpcColumn]
+                }));
+
+                return {
+                    headers: ['Target', 'RPC'],
+                    rows: simplifiedRows
+                };
+            }
+        }
+
+        return result || { headers: [], rows: [] };
+    },
+    
+    // Last resort: pair dollar amounts with the nearest text label
+    extractText: function() {
+        // Walk the document once, sorting leaf elements into possible RPC values (dollar
+        // amounts) and possible target names, with their text and position read up front
+        const dollarElements = [];
+        const textElements = [];
+        for (const el of document.querySelectorAll('*')) {
+            if (el.children.length > 0) continue;
+            const text = el.textContent.trim();
+            if (text.includes('$')) {
+                if (text.length < 20) dollarElements.push({ text: text, rect: el.getBoundingClientRect() });
+            } else if (text.length >= 2 && text.length <= 50) {
+                textElements.push({ text: text, rect: el.getBoundingClientRect() });
+            }
+        }
+
+        console.log(`Found ${dollarElements.length} potential dollar amount elements`);
+
+        // Function to find nearest text element that could be a target name
+        function findNearestText(rect) {
+            // Look for elements to the left or above
+            const candidates = textElements.filter(candidate => {
+                const elRect = candidate.rect;
+
+                // Check if it's to the left of the dollar amount (same row)
+                const sameRow = Math.abs(elRect.y - rect.y) < 20 && elRect.x < rect.x;
+
+                // Or check if it's in the row above and aligned
+                const rowAbove = (rect.y - elRect.y) > 20 && (rect.y - elRect.y) < 60 && 
+                                 Math.abs(elRect.x - rect.x) < 100;
+
+                return sameRow || rowAbove;
+            });
+
+            if (candidates.length === 0) return null;
+
+            // Sort by horizontal distance (for same row) or by vertical distance (for row above)
+            candidates.sort((a, b) => {
+                const aRect = a.rect;
+                const bRect = b.rect;
+
+                // Same row - sort by x distance
+                if (Math.abs(aRect.y - rect.y) < 20 && Math.abs(bRect.y - rect.y) < 20) {
+                    return (rect.x - aRect.x) - (rect.x - bRect.x);
                 }
+
+                // Different rows - sort by y distance
+                return (rect.y - aRect.y) - (rect.y - bRect.y);
+            });
+
+            return candidates[0];
+        }
+
+        // Extract RPC and corresponding Target names
+        const results = [];
+        dollarElements.forEach(element => {
+            const rpcText = element.text;
+
+            // Verify this looks like an RPC value
+            if (!/\\$\\d+(\\.\\d+)?/.test(rpcText)) return;
+
+            const targetElement = findNearestText(element.rect);
+            if (targetElement) {
+                results.push({
+                    Target: targetElement.text,
+                    RPC: rpcText
+                });
             }
-            
-            return result || { headers: [], rows: [] };
-        """)
+        });
+
+        return results;
+    },
+    
+    // Run the routines in order and return the first one that finds rows.
+    // The routine that worked on the previous run (if any) is tried first.
+    extractAll: function(preferred) {
+        const self = this;
+        const methods = {
+            structure: function() { return self.extractStructure(); },
+            table: function() { return self.extractTable(); },
+            text: function() { return { headers: ['Target', 'RPC'], rows: self.extractText() }; }
+        };
+
+        const order = ['structure', 'table', 'text'];
+        if (preferred && methods[preferred]) {
+            order.splice(order.indexOf(preferred), 1);
+            order.unshift(preferred);
+        }
+
+        for (const method of order) {
+            const result = methods[method]();
+            if (result && result.rows && result.rows.length > 0) {
+                return { method: method, headers: result.headers || [], rows: result.rows };
+            }
+        }
+
+        return { method: null, headers: [], rows: [] };
+    }
+};
+"""
+
+# File name prefix and log description for each extraction routine
+EXTRACTION_METHODS = {
+    'structure': ('ringba_ui_extract', 'Ringba UI structure'),
+    'table': ('table_extract', 'the summary table'),
+    'text': ('text_extract', 'last resort Target/RPC text matching'),
+}
+
+# Remembers which extraction routine worked so the next run tries it first
+EXTRACTION_METHOD_CACHE = os.path.join("/tmp", "ringba_extraction_method.json")
+EXTRACTION_METHOD_CACHE_TTL = 7 * 24 * 60 * 60  # 7 days
+# Only the structured routines are worth promoting; a text match win must not
+# push them down the order on later runs
+CACHEABLE_EXTRACTION_METHODS = ('structure', 'table')
+
+def load_preferred_extraction_method():
+    """Return the extraction routine that worked on a recent run, or None"""
+    try:
+        with open(EXTRACTION_METHOD_CACHE) as f:
+            cached = json.load(f)
+        if time.time() - cached.get('ts', 0) > EXTRACTION_METHOD_CACHE_TTL:
+            return None
+        method = cached.get('method')
+        return method if method in CACHEABLE_EXTRACTION_METHODS else None
+    except (OSError, ValueError):
+        return None
+
+def save_preferred_extraction_method(method):
+    """Remember the extraction routine that found data on this run"""
+    if method not in CACHEABLE_EXTRACTION_METHODS:
+        return
+    try:
+        with open(EXTRACTION_METHOD_CACHE, 'w') as f:
+            json.dump({'method': method, 'ts': time.time()}, f)
+    except OSError as e:
+        logger.warning(f"Could not save extraction method cache: {str(e)}")
+
+def run_extraction_script(browser, name, *args):
+    """Run one of the window.__ringba extraction routines, installing them on the page if needed"""
+    call = "window.__ringba[arguments[0]].apply(window.__ringba, Array.prototype.slice.call(arguments, 1))"
+    response = browser.execute_script(
+        "if (!window.__ringba) return {installed: false};"
+        "return {installed: true, result: " + call + "};",
+        name, *args
+    )
+    if response and response.get('installed'):
+        return response.get('result')
+    
+    # The routines weren't preinstalled in this document, so send them along with the call
+    logger.info("Installing table extraction routines on the page")
+    return browser.execute_script(RINGBA_EXTRACTION_JS + "return " + call + ";", name, *args)
+
+def click_export_csv(browser):
+    """Directly scrape the table data from the page instead of exporting CSV"""
+    try:
+        preferred_method = load_preferred_extraction_method()
+        if preferred_method:
+            logger.info(f"Trying last successful extraction method first: {preferred_method}")
+        
+        def extract_loaded_rows(driver):
+            # The summary page is a hash route off the call-logs page, so readyState is already
+            # 'complete' and the RPC header renders before any rows; wait for rows to extract instead
+            if 'report/summary' not in driver.current_url:
+                return False
+            result = run_extraction_script(driver, "extractAll", preferred_method)
+            return result if result and result.get('rows') else False
+        
+        # Navigate directly to the summary page
+        logger.info("Navigating directly to call summary report...")
+        extracted = None
+        try:
+            browser.get("https://app.ringba.com/#/dashboard/call-logs/report/summary")
+            logger.info("Waiting for summary page to load...")
+            # Poll until the report's data rows can be extracted instead of sleeping a fixed 20 seconds
+            try:
+                extracted = WebDriverWait(browser, 20, poll_frequency=1).until(extract_loaded_rows)
+            except TimeoutException:
+                logger.warning("Summary table rows did not appear within 20 seconds, trying extraction anyway")
+        except Exception as e:
+            logger.error(f"Failed to navigate to summary page: {str(e)}")
+            take_screenshot(browser, "navigation_failed", force=True)
+        
+        # Take screenshot of the full page
+        take_screenshot(browser, "before_table_extraction")
+        
+        # Run every extraction routine in the page with a single driver call, unless the wait already did
+        if not extracted:
+            logger.info("Extracting Target/RPC data from the Ringba summary page...")
+            extracted = run_extraction_script(browser, "extractAll", preferred_method)
         
-        # Check if we got data from the scraping
-        if table_data and 'rows' in table_data and table_data['rows']:
-            logger.info(f"Successfully extracted {len(table_data['rows'])} rows directly from page")
+        if extracted and extracted.get('rows'):
+            prefix, description = EXTRACTION_METHODS[extracted['method']]
+            logger.info(f"Successfully extracted {len(extracted['rows'])} rows using {description}")
+            save_preferred_extraction_method(extracted['method'])
             
             # Log the headers we found
-            if 'headers' in table_data:
-                logger.info(f"Extracted headers: {table_data['headers']}")
+            if extracted.get('headers'):
+                logger.info(f"Extracted headers: {extracted['headers']}")
             
             # Convert to DataFrame
-            df = pd.DataFrame(table_data['rows'])
+            df = pd.DataFrame(extracted['rows'])
             
             # Save to CSV file
-            file_path = os.path.join("/tmp", f"table_extract_{int(time.time())}.csv")
+            file_path = os.path.join("/tmp", f"{prefix}_{int(time.time())}.csv")
             df.to_csv(file_path, index=False)
             
-            logger.info(f"Saved extracted table data to {file_path}")
+            logger.info(f"Saved extracted data to {file_path}")
             return file_path
-        else:
-            # Take a screenshot to see what's on the page
-            take_screenshot(browser, "table_extraction_failed")
-            logger.warning("No data found in tables on the page")
-            
-            # Last resort: Try to scrape any text that looks like Target and RPC data
-            logger.info("Trying last resort extraction of any Target/RPC-like data...")
-            
-            target_rpc_data = browser.execute_script("""
-                // Find all elements that might contain RPC values (dollar amounts)
-                const dollarElements = Array.from(document.querySelectorAll('*'))
-                    .filter(el => {
-                        if (el.children.length > 0) return false;
-                        const text = el.textContent.trim();
-                        return text.includes('$') && text.length < 20;
-                    });
-                
-                console.log(`Found ${dollarElements.length} potential dollar amount elements`);
-                
-                // Function to find nearest text element that could be a target name
-                function findNearestText(element) {
-                    const rect = element.getBoundingClientRect();
-                    
-                    // Look for elements to the left or above
-                    const candidates = Array.from(document.querySelectorAll('*'))
-                        .filter(el => {
-                            if (el.children.length > 0) return false;
-                            const elRect = el.getBoundingClientRect();
-                            const text = el.textContent.trim();
-                            
-                            // Skip if it's a dollar amount itself
-                            if (text.includes('$')) return false;
-                            
-                            // Skip if text is too short or too long
-                            if (text.length < 2 || text.length > 50) return false;
-                            
-                            // Check if it's to the left of the dollar amount (same row)
-                            const sameRow = Math.abs(elRect.y - rect.y) < 20 && elRect.x < rect.x;
-                            
-                            // Or check if it's in the row above and aligned
-                            const rowAbove = (rect.y - elRect.y) > 20 && (rect.y - elRect.y) < 60 && 
-                                             Math.abs(elRect.x - rect.x) < 100;
-                            
-                            return sameRow || rowAbove;
-                        });
-                    
-                    if (candidates.length === 0) return null;
-                    
-                    // Sort by horizontal distance (for same row) or by vertical distance (for row above)
-                    candidates.sort((a, b) => {
-                        const aRect = a.getBoundingClientRect();
-                        const bRect = b.getBoundingClientRect();
-                        
-                        // Same row - sort by x distance
-                        if (Math.abs(aRect.y - rect.y) < 20 && Math.abs(bRect.y - rect.y) < 20) {
-                            return (rect.x - aRect.x) - (rect.x - bRect.x);
-                        }
-                        
-                        // Different rows - sort by y distance
-                        return (rect.y - aRect.y) - (rect.y - bRect.y);
-                    });
-                    
-                    return candidates[0];
-                }
-                
-                // Extract RPC and corresponding Target names
-                const results = [];
-                dollarElements.forEach(element => {
-                    const rpcText = element.textContent.trim();
-                    
-                    // Verify this looks like an RPC value
-                    if (!/\\$\\d+(\\.\\d+)?/.test(rpcText)) return;
-                    
-                    const targetElement = findNearestText(element);
-                    if (targetElement) {
-                        results.push({
-                            Target: targetElement.textContent.trim(),
-                            RPC: rpcText
-                        });
-                    }
-                });
-                
-                return results;
-            """)
-            
-            if target_rpc_data and len(target_rpc_data) > 0:
-                logger.info(f"Found {len(target_rpc_data)} potential Target/RPC pairs using last resort method")
-                
-                # Convert to DataFrame
-                df = pd.DataFrame(target_rpc_data)
-                
-                # Save to CSV file
-                file_path = os.path.join("/tmp", f"text_extract_{int(time.time())}.csv")
-                df.to_csv(file_path, index=False)
-                
-                logger.info(f"Saved extracted text data to {file_path}")
-                return file_path
-            
-            # If all extraction methods fail
-            logger.error("All extraction methods failed to find data")
-            return None
+        
+        # If all extraction methods fail, dump the page structure for debugging
+        take_screenshot(browser, "table_extraction_failed", force=True)
+        capture_page_structure(browser)
+        logger.error("All extraction methods failed to find data")
+        return None
             
     except Exception as e:
         logger.error(f"Error extracting table data: {str(e)}")
-        import traceback
         logger.error(traceback.format_exc())
-        take_screenshot(browser, "extraction_error")
+        take_screenshot(browser, "extraction_error", force=True)
         return None
 
+def sample_column_text(series):
+    """Join the first few values of a column into one string for cheap substring checks"""
+    return ' '.join(series.head(COLUMN_SAMPLE_ROWS).astype(str).tolist())
+
+def column_has_dollar(series):
+    """Check whether the head of a column contains dollar amounts"""
+    return '$' in sample_column_text(series)
+
+def column_has_target_values(series):
+    """Check whether the head of a column contains Target-like values (Live, Completed, IVR, ...)"""
+    sample = sample_column_text(series).lower()
+    return any(word in sample for word in TARGET_VALUE_WORDS)
+
 def process_csv_file(file_path):
     """Process the CSV file to extract targets with low RPC"""
     if not file_path or not os.path.exists(file_path):
@@ -1753,8 +2025,19 @@ def process_csv_file(file_path):
     logger.info(f"Processing CSV file: {file_path}")
     
     try:
-        # Read the CSV file
-        df = pd.read_csv(file_path)
+        # When the header already names the Target and RPC columns, parse only those two;
+        # otherwise every column is needed for the value-based guesses below
+        header = pd.read_csv(file_path, nrows=0).columns
+        known_target = next((col for col in TARGET_COLUMN_NAMES if col in header), None)
+        known_rpc = next((col for col in RPC_COLUMN_NAMES if col in header), None)
+        usecols = [known_target, known_rpc] if known_target and known_rpc else None
+        
+        # Read the CSV file with Arrow's multithreaded parser, falling back to the C engine
+        try:
+            df = pd.read_csv(file_path, engine='pyarrow', usecols=usecols)
+        except (ImportError, ValueError) as e:
+            logger.info(f"pyarrow CSV engine unavailable ({str(e)}), using the default parser")
+            df = pd.read_csv(file_path, usecols=usecols)
         
         # Log the columns and first few rows for debugging
         logger.info(f"CSV columns: {', '.join(df.columns)}")
@@ -1762,41 +2045,29 @@ def process_csv_file(file_path):
         
         # Show sample of the data
         if not df.empty:
-            sample_rows = min(2, len(df))
-            sample_df = df.head(sample_rows)
-            for i, row in sample_df.iterrows():
-                logger.info(f"Sample row {i+1}: {dict(row)}")
-        
-        # Look for relevant columns
-        target_col = None
-        rpc_col = None
-        
-        # Try different potential column names for target
-        for col in ['Target', 'Target Name', 'TargetName', 'Campaign', 'Target Campaign']:
-            if col in df.columns:
-                target_col = col
-                break
+            for i, row in enumerate(df.head(2).to_dict('records')):
+                logger.info(f"Sample row {i+1}: {row}")
+        
+        # Look for relevant columns by their known names (in order of preference)
+        column_names = set(df.columns)
+        target_col = next((col for col in TARGET_COLUMN_NAMES if col in column_names), None)
+        rpc_col = next((col for col in RPC_COLUMN_NAMES if col in column_names), None)
                 
         # If Target column not found, check for columns matching the word "Target"
         if not target_col:
-            target_cols = [col for col in df.columns if 'target' in col.lower()]
-            if target_cols:
-                target_col = target_cols[0]
+            target_col = next((col for col in df.columns if 'target' in str(col).lower()), None)
+            if target_col:
                 logger.info(f"Using column with 'target' in name: {target_col}")
                 
-        # Try different potential column names for RPC
-        for col in ['RPC', 'Avg. Revenue per Call', 'Revenue Per Call', 'Revenue per Call', 'RPCall', 'Revenue']:
-            if col in df.columns:
-                rpc_col = col
-                break
-                
+        # Columns that can hold text; numeric columns are skipped by the value-based guesses below
+        text_cols = df.select_dtypes(include=['object', 'string']).columns
+        
         # If RPC column not found, look for columns with $ values
         if not rpc_col:
-            # Check each column for dollar sign patterns
-            for col in df.columns:
-                # Sample the column to see if it contains dollar amounts
-                sample_values = df[col].astype(str).str.contains('\$').sum()
-                if sample_values > 0:
+            # Check the text columns for dollar sign patterns; numeric columns can't hold them
+            for col in text_cols:
+                # Sample the head of the column to see if it contains dollar amounts
+                if column_has_dollar(df[col]):
                     rpc_col = col
                     logger.info(f"Using column with $ values as RPC: {rpc_col}")
                     break
@@ -1808,9 +2079,8 @@ def process_csv_file(file_path):
             
             # Try to identify which column might be Target based on values
             # Look for columns containing values like "Target", "Live", "Completed"
-            for col in df.columns:
-                values = df[col].astype(str).str.lower()
-                if values.str.contains('target|live|completed|ivr').any():
+            for col in text_cols:
+                if column_has_target_values(df[col]):
                     target_col = col
                     logger.info(f"Identified Target column as {col} based on values")
                     break
@@ -1822,9 +2092,8 @@ def process_csv_file(file_path):
                 
             # Try to identify RPC column by looking for $ values
             if not rpc_col:
-                for col in df.columns:
-                    sample = df[col].astype(str)
-                    if sample.str.contains('\$').any():
+                for col in text_cols:
+                    if column_has_dollar(df[col]):
                         rpc_col = col
                         logger.info(f"Identified RPC column as {col} based on $ values")
                         break
@@ -1836,45 +2105,42 @@ def process_csv_file(file_path):
                 
         # If we couldn't find the target column at all, log and try to continue
         if not target_col:
-            # As a last resort, pick a column that looks like it has names
-            for col in df.columns:
-                # Check if column has string values that could be target names
-                if df[col].dtype == 'object' and df[col].astype(str).str.len().mean() > 3:
-                    target_col = col
-                    logger.info(f"Using {col} as Target column based on string content")
-                    break
+            # As a last resort, pick the text column with the longest values (most name-like)
+            if len(text_cols) > 0:
+                text_lengths = df[text_cols].apply(lambda col: col.astype(str).str.len().mean())
+                if text_lengths.max() > 3:
+                    target_col = text_lengths.idxmax()
+                    logger.info(f"Using {target_col} as Target column based on string content")
                     
-            if not target_col and len(df.columns) >= 3:
-                target_col = df.columns[2]  # Use the third column by position
-                logger.info(f"Last resort: Using {target_col} as Target column")
-            elif not target_col and len(df.columns) > 0:
-                target_col = df.columns[0]  # Use the first column as a last resort
-                logger.info(f"Absolute last resort: Using {target_col} as Target column")
-            else:
+            if not target_col:
+                if len(df.columns) >= 3:
+                    target_col = df.columns[2]  # Use the third column by position
+                    logger.info(f"Last resort: Using {target_col} as Target column")
+                elif len(df.columns) > 0:
+                    target_col = df.columns[0]  # Use the first column as a last resort
+                    logger.info(f"Absolute last resort: Using {target_col} as Target column")
+                    
+            if not target_col:
                 logger.error("Could not find Target column in CSV")
                 return None
                 
         # Same logic for RPC column
         if not rpc_col:
-            # As a last resort, pick a numeric column that could be RPC
-            for col in df.columns:
-                try:
-                    # Check if column can be converted to numeric
-                    test_numeric = pd.to_numeric(df[col], errors='coerce')
-                    if test_numeric.notna().sum() > 0:
-                        rpc_col = col
-                        logger.info(f"Using {col} as RPC column based on numeric content")
-                        break
-                except:
-                    continue
+            # As a last resort, pick the column where most values convert to numbers
+            numeric_density = df.drop(columns=[target_col]).apply(pd.to_numeric, errors='coerce').notna().mean()
+            if not numeric_density.empty and numeric_density.max() > 0.5:
+                rpc_col = numeric_density.idxmax()
+                logger.info(f"Using {rpc_col} as RPC column based on numeric content")
                     
-            if not rpc_col and len(df.columns) >= 10:
-                rpc_col = df.columns[9]  # Use the tenth column by position (typical for RPC)
-                logger.info(f"Last resort: Using {rpc_col} as RPC column")
-            elif not rpc_col and len(df.columns) > 1:
-                rpc_col = df.columns[1]  # Use the second column as a last resort
-                logger.info(f"Absolute last resort: Using {rpc_col} as RPC column")
-            else:
+            if not rpc_col:
+                if len(df.columns) >= 10:
+                    rpc_col = df.columns[9]  # Use the tenth column by position (typical for RPC)
+                    logger.info(f"Last resort: Using {rpc_col} as RPC column")
+                elif len(df.columns) > 1:
+                    rpc_col = df.columns[1]  # Use the second column as a last resort
+                    logger.info(f"Absolute last resort: Using {rpc_col} as RPC column")
+                    
+            if not rpc_col:
                 logger.error("Could not find RPC column in CSV")
                 return None
             
@@ -1884,29 +2150,22 @@ def process_csv_file(file_path):
         if not df.empty:
             logger.info(f"Sample RPC values: {df[rpc_col].head(3).tolist()}")
         
-        # Convert RPC column to numeric, handling currency symbols and commas
+        # Convert RPC column to numeric, handling currency symbols and commas in one vectorized pass
         try:
-            # First try a straightforward approach
-            df[rpc_col] = df[rpc_col].replace('[\$,]', '', regex=True).astype(float)
-        except:
-            # If that fails, try more careful conversion
-            try:
-                # Convert to string first
-                df[rpc_col] = df[rpc_col].astype(str)
-                # Remove currency symbols and commas
-                df[rpc_col] = df[rpc_col].str.replace('[\$,£€]', '', regex=True)
-                # Convert to float, treating errors as NaN
-                df[rpc_col] = pd.to_numeric(df[rpc_col], errors='coerce')
-                # Log NaN counts to debug conversion issues
-                nan_count = df[rpc_col].isna().sum()
-                if nan_count > 0:
-                    logger.warning(f"Found {nan_count} NaN values in RPC column after conversion")
-                # Drop rows where conversion failed
-                df = df.dropna(subset=[rpc_col])
-                logger.info(f"Converted {rpc_col} to numeric with {len(df)} valid rows")
-            except Exception as e:
-                logger.error(f"Could not convert RPC column to numeric: {str(e)}")
-                return None
+            # API extracts already parse as numbers; only text columns need the currency strip
+            if not pd.api.types.is_numeric_dtype(df[rpc_col]):
+                cleaned_rpc = df[rpc_col].astype(str).str.replace(CURRENCY_CLEANUP_RE, '', regex=True)
+                df[rpc_col] = pd.to_numeric(cleaned_rpc, errors='coerce')
+            # Log NaN counts to debug conversion issues
+            nan_count = df[rpc_col].isna().sum()
+            if nan_count > 0:
+                logger.warning(f"Found {nan_count} NaN values in RPC column after conversion")
+            # Drop rows where conversion failed
+            df = df.dropna(subset=[rpc_col])
+            logger.info(f"Converted {rpc_col} to numeric with {len(df)} valid rows")
+        except Exception as e:
+            logger.error(f"Could not convert RPC column to numeric: {str(e)}")
+            return None
         
         # Print converted RPC values
         if not df.empty:
@@ -1914,7 +2173,7 @@ def process_csv_file(file_path):
             logger.info(f"RPC column min: {df[rpc_col].min()}, max: {df[rpc_col].max()}, mean: {df[rpc_col].mean()}")
         
         # Get threshold from environment variable or use default
-        rpc_threshold = float(os.getenv('RPC_THRESHOLD', 12.0))
+        rpc_threshold = RPC_THRESHOLD
         logger.info(f"Using RPC threshold of ${rpc_threshold}")
         
         # Filter for targets below the threshold
@@ -1929,12 +2188,13 @@ def process_csv_file(file_path):
         
         # Log the results
         if not low_rpc_targets.empty:
-            logger.info(f"Found {len(low_rpc_targets)} targets below the RPC threshold:")
-            for index, row in low_rpc_targets.iterrows():
-                logger.info(f"  {row[target_col]}: ${row[rpc_col]:.2f}")
+            target_lines = (
+                low_rpc_targets[target_col].astype(str) + ': $' + low_rpc_targets[rpc_col].map('{:.2f}'.format)
+            ).tolist()
+            logger.info(f"Found {len(low_rpc_targets)} targets below the RPC threshold:\n  " + "\n  ".join(target_lines))
             
             return {
-                'targets': low_rpc_targets.to_dict('records'),
+                'targets': low_rpc_targets,
                 'target_col': target_col,
                 'rpc_col': rpc_col,
                 'threshold': rpc_threshold
@@ -1945,34 +2205,30 @@ def process_csv_file(file_path):
             
     except Exception as e:
         logger.error(f"Error processing CSV file: {str(e)}")
-        import traceback
         logger.error(traceback.format_exc())
         return None
 
-def check_time_range(current_time, target_time, window_minutes=30):
-    """Check if current time is within window_minutes of target time"""
-    try:
-        # Parse times
-        current_hour, current_minute = map(int, current_time.split(':'))
-        target_hour, target_minute = map(int, target_time.split(':'))
-        
-        # Convert to minutes
-        current_minutes = current_hour * 60 + current_minute
-        target_minutes = target_hour * 60 + target_minute
-        
-        # Check if within window
-        return abs(current_minutes - target_minutes) <= window_minutes
-    except Exception as e:
-        logger.error(f"Error checking time range: {str(e)}")
-        return False
+def time_to_minutes(hhmm):
+    """Convert an "HH:MM" string to minutes since midnight"""
+    hour, minute = hhmm.split(':')
+    return int(hour) * 60 + int(minute)
+
+# Scheduled check times as minutes since midnight, parsed once
+MORNING_CHECK_MINUTES = time_to_minutes(MORNING_CHECK_TIME)
+MIDDAY_CHECK_MINUTES = time_to_minutes(MIDDAY_CHECK_TIME)
+AFTERNOON_CHECK_MINUTES = time_to_minutes(AFTERNOON_CHECK_TIME)
+
+def check_time_range(current_minutes, target_minutes, window_minutes=30):
+    """Check if current time is within window_minutes of target time (both in minutes since midnight)"""
+    return abs(current_minutes - target_minutes) <= window_minutes
 
 def send_to_slack(data, run_type):
     """Send notification to Slack with targets below RPC threshold"""
-    if not data or 'targets' not in data or not data['targets']:
+    if not data or 'targets' not in data or data['targets'].empty:
         logger.warning("No data to send to Slack")
         return False
         
-    webhook_url = os.getenv('SLACK_WEBHOOK_URL')
+    webhook_url = SLACK_WEBHOOK_URL
     if not webhook_url:
         logger.error("SLACK_WEBHOOK_URL environment variable not set")
         return False
@@ -2007,27 +2263,26 @@ def send_to_slack(data, run_type):
             ]
         }
         
-        # Add targets to message in chunks (to avoid message size limits)
-        target_texts = []
-        for target in targets:
-            target_name = target[target_col]
-            target_rpc = target[rpc_col]
-            target_texts.append(f"• *{target_name}*: ${target_rpc:.2f}")
+        # Add targets to message in chunks (to avoid message size limits), formatting whole columns at once
+        target_texts = (
+            "• *" + targets[target_col].astype(str) + "*: $" + targets[rpc_col].map("{:.2f}".format)
+        ).tolist()
             
         # Split into chunks of 20 targets
         chunk_size = 20
-        for i in range(0, len(target_texts), chunk_size):
-            chunk = target_texts[i:i+chunk_size]
-            message["blocks"].append({
+        message["blocks"].extend(
+            {
                 "type": "section",
                 "text": {
                     "type": "mrkdwn",
-                    "text": "\n".join(chunk)
+                    "text": "\n".join(target_texts[i:i+chunk_size])
                 }
-            })
+            }
+            for i in range(0, len(target_texts), chunk_size)
+        )
             
-        # Send to Slack
-        response = requests.post(webhook_url, json=message)
+        # Send to Slack over the shared session so the connection is reused between runs
+        response = SLACK_SESSION.post(webhook_url, json=message, timeout=10)
         
         if response.status_code == 200:
             logger.info(f"Successfully sent {run_type} report to Slack")
@@ -2043,20 +2298,17 @@ def send_to_slack(data, run_type):
 def save_morning_results(targets_df, target_col, rpc_col):
     """Save morning results for comparison with afternoon run"""
     try:
-        # Create a copy to avoid any reference issues
-        df_copy = targets_df.copy()
+        # Save only the Target and RPC columns (all the comparison reads back) as Arrow
+        # feather, which loads without a decode step, with the column names alongside it as JSON
+        targets_df.loc[:, [target_col, rpc_col]].reset_index(drop=True).to_feather('morning_results.feather')
         
-        # Create a dictionary with all the data we need
-        morning_data = {
-            'targets_df': df_copy,
+        morning_meta = {
             'target_col': target_col,
             'rpc_col': rpc_col,
             'timestamp': datetime.now().isoformat()
         }
-        
-        # Save as pickle for complete data preservation
-        with open('morning_results.pkl', 'wb') as f:
-            pickle.dump(morning_data, f)
+        with open('morning_results.meta.json', 'w') as f:
+            json.dump(morning_meta, f)
         
         logger.info("Morning results saved successfully")
         return True
@@ -2067,17 +2319,17 @@ def save_morning_results(targets_df, target_col, rpc_col):
 def load_morning_results():
     """Load morning results for afternoon comparison"""
     try:
-        # Check if the file exists
-        if not os.path.exists('morning_results.pkl'):
+        # Check if the files exist
+        if not os.path.exists('morning_results.meta.json') or not os.path.exists('morning_results.feather'):
             logger.warning("Morning results file does not exist")
             return None
         
-        # Load the saved data
-        with open('morning_results.pkl', 'rb') as f:
-            morning_data = pickle.load(f)
+        # Load the metadata first so stale results are rejected without reading the DataFrame
+        with open('morning_results.meta.json') as f:
+            morning_data = json.load(f)
         
         # Verify the data has the expected structure
-        required_keys = ['targets_df', 'target_col', 'rpc_col']
+        required_keys = ['target_col', 'rpc_col', 'timestamp']
         if not all(key in morning_data for key in required_keys):
             logger.warning("Morning results file has invalid format")
             return None
@@ -2090,6 +2342,12 @@ def load_morning_results():
             logger.warning(f"Morning results are from {timestamp.date()}, not from today ({today})")
             return None
         
+        # Only the two columns used by the comparison are read back
+        morning_data['targets_df'] = pd.read_feather(
+            'morning_results.feather',
+            columns=[morning_data['target_col'], morning_data['rpc_col']]
+        )
+        
         logger.info("Morning results loaded successfully")
         return morning_data
     except Exception as e:
@@ -2099,20 +2357,17 @@ def load_morning_results():
 def save_midday_results(targets_df, target_col, rpc_col):
     """Save midday results for comparison with afternoon run"""
     try:
-        # Create a copy to avoid any reference issues
-        df_copy = targets_df.copy()
+        # Save only the Target and RPC columns (all the comparison reads back) as Arrow
+        # feather, which loads without a decode step, with the column names alongside it as JSON
+        targets_df.loc[:, [target_col, rpc_col]].reset_index(drop=True).to_feather('midday_results.feather')
         
-        # Create a dictionary with all the data we need
-        midday_data = {
-            'targets_df': df_copy,
+        midday_meta = {
             'target_col': target_col,
             'rpc_col': rpc_col,
             'timestamp': datetime.now().isoformat()
         }
-        
-        # Save as pickle for complete data preservation
-        with open('midday_results.pkl', 'wb') as f:
-            pickle.dump(midday_data, f)
+        with open('midday_results.meta.json', 'w') as f:
+            json.dump(midday_meta, f)
         
         logger.info("Midday results saved successfully")
         return True
@@ -2123,17 +2378,17 @@ def save_midday_results(targets_df, target_col, rpc_col):
 def load_midday_results():
     """Load midday results for afternoon comparison"""
     try:
-        # Check if the file exists
-        if not os.path.exists('midday_results.pkl'):
+        # Check if the files exist
+        if not os.path.exists('midday_results.meta.json') or not os.path.exists('midday_results.feather'):
             logger.warning("Midday results file does not exist")
             return None
         
-        # Load the saved data
-        with open('midday_results.pkl', 'rb') as f:
-            midday_data = pickle.load(f)
+        # Load the metadata first so stale results are rejected without reading the DataFrame
+        with open('midday_results.meta.json') as f:
+            midday_data = json.load(f)
         
         # Verify the data has the expected structure
-        required_keys = ['targets_df', 'target_col', 'rpc_col']
+        required_keys = ['target_col', 'rpc_col', 'timestamp']
         if not all(key in midday_data for key in required_keys):
             logger.warning("Midday results file has invalid format")
             return None
@@ -2146,12 +2401,82 @@ def load_midday_results():
             logger.warning(f"Midday results are from {timestamp.date()}, not from today ({today})")
             return None
         
+        # Only the two columns used by the comparison are read back
+        midday_data['targets_df'] = pd.read_feather(
+            'midday_results.feather',
+            columns=[midday_data['target_col'], midday_data['rpc_col']]
+        )
+        
         logger.info("Midday results loaded successfully")
         return midday_data
     except Exception as e:
         logger.error(f"Failed to load midday results: {str(e)}")
         return None
 
+def compare_with_previous_run(previous_data, targets_df, target_col, rpc_col, previous_label, current_label):
+    """Join the current run with a previous run's saved results and find the targets below threshold"""
+    rpc_threshold = RPC_THRESHOLD
+    previous_rpc = f"{previous_label}_rpc"
+    current_rpc = f"{current_label}_rpc"
+    
+    # Get the previous run's data components
+    previous_df = previous_data['targets_df']
+    previous_target_col = previous_data['target_col']
+    previous_rpc_col = previous_data['rpc_col']
+    
+    # Make sure both DataFrames have the same columns
+    if not target_col in targets_df.columns or not rpc_col in targets_df.columns:
+        logger.error(f"Current data missing required columns: {target_col}, {rpc_col}")
+        return None
+    
+    if not previous_target_col in previous_df.columns or not previous_rpc_col in previous_df.columns:
+        logger.error(f"{previous_label.capitalize()} data missing required columns: {previous_target_col}, {previous_rpc_col}")
+        return None
+    
+    # Encode both runs' target names against one shared, sorted set of categories so the
+    # outer join is done on integer codes rather than by hashing every name string
+    previous_df = previous_df.drop_duplicates(previous_target_col)
+    targets_df = targets_df.drop_duplicates(target_col)
+    categories = pd.Index(previous_df[previous_target_col]).append(pd.Index(targets_df[target_col])).dropna().unique().sort_values()
+    name_dtype = pd.CategoricalDtype(categories)
+    previous_codes = previous_df[previous_target_col].astype(name_dtype).cat.codes.to_numpy()
+    current_codes = targets_df[target_col].astype(name_dtype).cat.codes.to_numpy()
+    
+    # One slot per category plus a last slot for the unnamed (totals) row, whose code is -1.
+    # Targets missing from a run count as 0 RPC
+    previous_rpcs = np.zeros(len(categories) + 1)
+    current_rpcs = np.zeros(len(categories) + 1)
+    previous_rpcs[previous_codes] = np.nan_to_num(previous_df[previous_rpc_col].to_numpy(dtype=np.float64))
+    current_rpcs[current_codes] = np.nan_to_num(targets_df[rpc_col].to_numpy(dtype=np.float64))
+    
+    # Keep the totals slot only if one of the runs had an unnamed row; it is labelled
+    # here so the Slack formatting needn't check each row
+    target_names = list(categories)
+    if (previous_codes == -1).any() or (current_codes == -1).any():
+        target_names.append(TOTAL_ROW_LABEL)
+    target_names = np.array(target_names, dtype=object)
+    previous_rpcs = previous_rpcs[:len(target_names)]
+    current_rpcs = current_rpcs[:len(target_names)]
+    
+    # One comparison per array; the current-run mask is shared by both filters
+    below_now = current_rpcs < rpc_threshold
+    went_below = below_now & (previous_rpcs >= rpc_threshold)
+    
+    # Build only the two small result frames rather than a full joined frame to filter
+    below_idx = np.flatnonzero(below_now)
+    went_below_idx = np.flatnonzero(went_below)
+    current_below_threshold = pd.DataFrame({
+        target_col: target_names[below_idx],
+        previous_rpc: previous_rpcs[below_idx],
+        current_rpc: current_rpcs[below_idx]
+    })
+    went_below_threshold = pd.DataFrame({
+        target_col: target_names[went_below_idx],
+        previous_rpc: previous_rpcs[went_below_idx],
+        current_rpc: current_rpcs[went_below_idx]
+    })
+    return current_below_threshold, went_below_threshold
+
 def compare_and_send_midday_results(targets_df, target_col, rpc_col):
     """Compare midday results with morning run and send notification"""
     try:
@@ -2163,48 +2488,13 @@ def compare_and_send_midday_results(targets_df, target_col, rpc_col):
             # Just send regular results without comparison
             return send_results_to_slack(targets_df, target_col, rpc_col, run_label='midday')
         
-        # Get threshold from environment variable or use default
-        rpc_threshold = float(os.getenv('RPC_THRESHOLD', 12.0))
-        
-        # Get the morning data components
-        morning_df = morning_data['targets_df']
-        morning_target_col = morning_data['target_col']
-        morning_rpc_col = morning_data['rpc_col']
-        
-        # Make sure both DataFrames have the same columns
-        if not target_col in targets_df.columns or not rpc_col in targets_df.columns:
-            logger.error(f"Current data missing required columns: {target_col}, {rpc_col}")
-            return send_results_to_slack(targets_df, target_col, rpc_col, run_label='midday')
-        
-        if not morning_target_col in morning_df.columns or not morning_rpc_col in morning_df.columns:
-            logger.error(f"Morning data missing required columns: {morning_target_col}, {morning_rpc_col}")
+        comparison = compare_with_previous_run(morning_data, targets_df, target_col, rpc_col, 'morning', 'midday')
+        if comparison is None:
             return send_results_to_slack(targets_df, target_col, rpc_col, run_label='midday')
-        
-        # Rename columns to avoid confusion
-        targets_df = targets_df.rename(columns={rpc_col: 'midday_rpc'})
-        morning_df = morning_df.rename(columns={morning_rpc_col: 'morning_rpc'})
-        
-        # Merge the dataframes on target column
-        merged_df = pd.merge(morning_df, targets_df, how='outer', left_on=morning_target_col, right_on=target_col)
-        
-        # Fill NaN values
-        merged_df['morning_rpc'] = merged_df['morning_rpc'].fillna(0)
-        merged_df['midday_rpc'] = merged_df['midday_rpc'].fillna(0)
-        
-        # Use original target column if available, otherwise morning target column
-        merged_df[target_col] = merged_df[target_col].fillna(merged_df[morning_target_col])
-        
-        # Find targets that went below the threshold since morning
-        went_below_threshold = merged_df[
-            (merged_df['morning_rpc'] >= rpc_threshold) & 
-            (merged_df['midday_rpc'] < rpc_threshold)
-        ]
-        
-        # Current targets BELOW threshold in midday run
-        current_below_threshold = merged_df[merged_df['midday_rpc'] < rpc_threshold]
+        current_below_threshold, went_below_threshold = comparison
         
         # Save midday results for afternoon comparison
-        save_midday_results(targets_df, target_col, 'midday_rpc')
+        save_midday_results(targets_df, target_col, rpc_col)
         
         # Send midday results with comparison
         return send_midday_comparison_to_slack(
@@ -2221,16 +2511,23 @@ def compare_and_send_midday_results(targets_df, target_col, rpc_col):
 
 def send_midday_comparison_to_slack(targets_df, went_below_df, target_col, rpc_col, morning_rpc_col):
     """Send midday comparison results to Slack"""
-    import requests
-    
     try:
-        webhook_url = os.getenv('SLACK_WEBHOOK_URL')
+        # Nothing below threshold and nothing newly dropped: skip the post unless asked for all-clear messages
+        if went_below_df.empty and targets_df.empty and not NOTIFY_ON_EMPTY:
+            logger.info("No targets below threshold, skipping midday Slack notification")
+            return True
+        
+        webhook_url = SLACK_WEBHOOK_URL
         if not webhook_url:
             logger.error("Slack webhook URL not configured, skipping notification")
             return False
         
         # Get RPC threshold for context
-        rpc_threshold = float(os.getenv('RPC_THRESHOLD', '12.0'))
+        rpc_threshold = RPC_THRESHOLD
+        
+        # Bind the per-row line templates once instead of re-parsing them for every target
+        below_line_format = "• *{}*: {:.2f} → {:.2f} ({:.1f}%)\n".format
+        current_line_format = "• *{}*: RPC = {:.2f}\n".format
         
         # Format the date for display
         today = datetime.now().strftime('%Y-%m-%d')
@@ -2251,15 +2548,18 @@ def send_midday_comparison_to_slack(targets_df, went_below_df, target_col, rpc_c
         
         # Targets that fell below threshold since morning
         if not went_below_df.empty:
-            below_list = "*Targets that FELL BELOW ${:.2f} RPC since morning:* 📉\n".format(rpc_threshold)
-            for _, row in went_below_df.iterrows():
-                target_name = row[target_col] if not pd.isna(row[target_col]) else "Total RPC (including the ones below $12)"
-                morning_rpc = row[morning_rpc_col]
-                midday_rpc = row[rpc_col]
-                change = midday_rpc - morning_rpc
-                change_pct = (change / morning_rpc) * 100 if morning_rpc > 0 else 0
-                
-                below_list += f"• *{target_name}*: {morning_rpc:.2f} → {midday_rpc:.2f} ({change_pct:.1f}%)\n"
+            # Compute the percentage changes column-wise, then format each line once
+            target_names = went_below_df[target_col].to_numpy()
+            morning_rpcs = went_below_df[morning_rpc_col].to_numpy(dtype=np.float64)
+            midday_rpcs = went_below_df[rpc_col].to_numpy(dtype=np.float64)
+            change_pcts = np.divide(
+                midday_rpcs - morning_rpcs, morning_rpcs,
+                out=np.zeros_like(morning_rpcs), where=morning_rpcs > 0
+            ) * 100
+            
+            below_list = "*Targets that FELL BELOW ${:.2f} RPC since morning:* 📉\n".format(rpc_threshold) + "".join(
+                map(below_line_format, target_names, morning_rpcs, midday_rpcs, change_pcts)
+            )
             
             message["blocks"].append({
                 "type": "section",
@@ -2284,11 +2584,13 @@ def send_midday_comparison_to_slack(targets_df, went_below_df, target_col, rpc_c
         
         # Current targets BELOW threshold
         if not targets_df.empty:
-            current_list = f"*Current Targets Below ${rpc_threshold:.2f} RPC:* 📉\n"
-            for _, row in targets_df.iterrows():
-                target_name = row[target_col] if not pd.isna(row[target_col]) else "Total RPC (including the ones below $12)"
-                rpc_value = row[rpc_col]
-                current_list += f"• *{target_name}*: RPC = {rpc_value:.2f}\n"
+            current_parts = [f"*Current Targets Below ${rpc_threshold:.2f} RPC:* 📉\n"]
+            current_parts.extend(map(
+                current_line_format,
+                targets_df[target_col].to_numpy(),
+                targets_df[rpc_col].to_numpy(dtype=np.float64)
+            ))
+            current_list = "".join(current_parts)
             
             message["blocks"].append({
                 "type": "section",
@@ -2318,10 +2620,11 @@ def send_midday_comparison_to_slack(targets_df, went_below_df, target_col, rpc_c
         })
         
         # Send the message
-        response = requests.post(
+        response = SLACK_SESSION.post(
             webhook_url,
             json=message,
-            headers={'Content-Type': 'application/json'}
+            headers={'Content-Type': 'application/json'},
+            timeout=10
         )
         
         if response.status_code == 200:
@@ -2339,118 +2642,35 @@ def compare_and_send_afternoon_results(targets_df, target_col, rpc_col, run_labe
     """Compare afternoon results with midday run and send notification"""
     try:
         # First try to load midday results - this is the priority for afternoon comparison
-        midday_data = load_midday_results()
+        previous_data = load_midday_results()
+        previous_run_name = "midday"
         
-        if midday_data:
+        if previous_data:
             logger.info("Using midday results for afternoon comparison")
-            
-            # Get threshold from environment variable or use default
-            rpc_threshold = float(os.getenv('RPC_THRESHOLD', 12.0))
-            
-            # Get the midday data components
-            midday_df = midday_data['targets_df']
-            midday_target_col = midday_data['target_col']
-            midday_rpc_col = midday_data['rpc_col']
-            
-            # Make sure both DataFrames have the same columns
-            if not target_col in targets_df.columns or not rpc_col in targets_df.columns:
-                logger.error(f"Current data missing required columns: {target_col}, {rpc_col}")
-                return send_results_to_slack(targets_df, target_col, rpc_col, run_label=run_label)
-            
-            if not midday_target_col in midday_df.columns or not midday_rpc_col in midday_df.columns:
-                logger.error(f"Midday data missing required columns: {midday_target_col}, {midday_rpc_col}")
-                return send_results_to_slack(targets_df, target_col, rpc_col, run_label=run_label)
-            
-            # Rename columns to avoid confusion
-            targets_df = targets_df.rename(columns={rpc_col: 'afternoon_rpc'})
-            midday_df = midday_df.rename(columns={midday_rpc_col: 'midday_rpc'})
-            
-            # Merge the dataframes on target column
-            merged_df = pd.merge(midday_df, targets_df, how='outer', left_on=midday_target_col, right_on=target_col)
-            
-            # Fill NaN values
-            merged_df['midday_rpc'] = merged_df['midday_rpc'].fillna(0)
-            merged_df['afternoon_rpc'] = merged_df['afternoon_rpc'].fillna(0)
-            
-            # Use original target column if available, otherwise midday target column
-            merged_df[target_col] = merged_df[target_col].fillna(merged_df[midday_target_col])
-            
-            # Find targets that went below the threshold since midday
-            went_below_threshold = merged_df[
-                (merged_df['midday_rpc'] >= rpc_threshold) & 
-                (merged_df['afternoon_rpc'] < rpc_threshold)
-            ]
-            
-            # Current targets BELOW threshold in afternoon run
-            current_below_threshold = merged_df[merged_df['afternoon_rpc'] < rpc_threshold]
-            
-            # Send afternoon results with comparison to midday
-            return send_afternoon_comparison_to_slack(
-                targets_df=current_below_threshold, 
-                went_below_df=went_below_threshold, 
-                previous_run_name="midday",
-                target_col=target_col, 
-                rpc_col='afternoon_rpc', 
-                previous_rpc_col='midday_rpc'
-            )
-        
-        # If no midday results, fall back to morning comparison
-        logger.warning("No midday results available, falling back to morning comparison")
-        morning_data = load_morning_results()
+        else:
+            # If no midday results, fall back to morning comparison
+            logger.warning("No midday results available, falling back to morning comparison")
+            previous_data = load_morning_results()
+            previous_run_name = "morning"
         
-        if not morning_data:
+        if not previous_data:
             logger.warning("No morning results available for comparison either")
             # Just send regular results without comparison
             return send_results_to_slack(targets_df, target_col, rpc_col, run_label=run_label)
         
-        # Get threshold from environment variable or use default
-        rpc_threshold = float(os.getenv('RPC_THRESHOLD', 12.0))
-        
-        # Get the morning data components
-        morning_df = morning_data['targets_df']
-        morning_target_col = morning_data['target_col']
-        morning_rpc_col = morning_data['rpc_col']
-        
-        # Make sure both DataFrames have the same columns
-        if not target_col in targets_df.columns or not rpc_col in targets_df.columns:
-            logger.error(f"Current data missing required columns: {target_col}, {rpc_col}")
-            return send_results_to_slack(targets_df, target_col, rpc_col, run_label=run_label)
-        
-        if not morning_target_col in morning_df.columns or not morning_rpc_col in morning_df.columns:
-            logger.error(f"Morning data missing required columns: {morning_target_col}, {morning_rpc_col}")
+        comparison = compare_with_previous_run(previous_data, targets_df, target_col, rpc_col, previous_run_name, 'afternoon')
+        if comparison is None:
             return send_results_to_slack(targets_df, target_col, rpc_col, run_label=run_label)
+        current_below_threshold, went_below_threshold = comparison
         
-        # Rename columns to avoid confusion
-        targets_df = targets_df.rename(columns={rpc_col: 'afternoon_rpc'})
-        morning_df = morning_df.rename(columns={morning_rpc_col: 'morning_rpc'})
-        
-        # Merge the dataframes on target column
-        merged_df = pd.merge(morning_df, targets_df, how='outer', left_on=morning_target_col, right_on=target_col)
-        
-        # Fill NaN values
-        merged_df['morning_rpc'] = merged_df['morning_rpc'].fillna(0)
-        merged_df['afternoon_rpc'] = merged_df['afternoon_rpc'].fillna(0)
-        
-        # Use original target column if available, otherwise morning target column
-        merged_df[target_col] = merged_df[target_col].fillna(merged_df[morning_target_col])
-        
-        # Find targets that went below the threshold since morning
-        went_below_threshold = merged_df[
-            (merged_df['morning_rpc'] >= rpc_threshold) & 
-            (merged_df['afternoon_rpc'] < rpc_threshold)
-        ]
-        
-        # Current targets BELOW threshold in afternoon run
-        current_below_threshold = merged_df[merged_df['afternoon_rpc'] < rpc_threshold]
-        
-        # Send afternoon results with comparison to morning
+        # Send afternoon results with comparison to the previous run
         return send_afternoon_comparison_to_slack(
             targets_df=current_below_threshold, 
             went_below_df=went_below_threshold, 
-            previous_run_name="morning",
+            previous_run_name=previous_run_name,
             target_col=target_col, 
             rpc_col='afternoon_rpc', 
-            previous_rpc_col='morning_rpc'
+            previous_rpc_col=f"{previous_run_name}_rpc"
         )
     except Exception as e:
         logger.error(f"Error comparing afternoon results: {str(e)}")
@@ -2459,16 +2679,23 @@ def compare_and_send_afternoon_results(targets_df, target_col, rpc_col, run_labe
 
 def send_afternoon_comparison_to_slack(targets_df, went_below_df, previous_run_name, target_col, rpc_col, previous_rpc_col):
     """Send afternoon comparison results to Slack"""
-    import requests
-    
     try:
-        webhook_url = os.getenv('SLACK_WEBHOOK_URL')
+        # Nothing below threshold and nothing newly dropped: skip the post unless asked for all-clear messages
+        if went_below_df.empty and targets_df.empty and not NOTIFY_ON_EMPTY:
+            logger.info("No targets below threshold, skipping afternoon Slack notification")
+            return True
+        
+        webhook_url = SLACK_WEBHOOK_URL
         if not webhook_url:
             logger.error("Slack webhook URL not configured, skipping notification")
             return False
         
         # Get RPC threshold for context
-        rpc_threshold = float(os.getenv('RPC_THRESHOLD', '12.0'))
+        rpc_threshold = RPC_THRESHOLD
+        
+        # Bind the per-row line templates once instead of re-parsing them for every target
+        below_line_format = "• *{}*: {:.2f} → {:.2f} ({:.1f}%)\n".format
+        current_line_format = "• *{}*: RPC = {:.2f}\n".format
         
         # Format the date for display
         today = datetime.now().strftime('%Y-%m-%d')
@@ -2489,15 +2716,18 @@ def send_afternoon_comparison_to_slack(targets_df, went_below_df, previous_run_n
         
         # Targets that fell below threshold since previous run
         if not went_below_df.empty:
-            below_list = f"*Targets that FELL BELOW ${rpc_threshold:.2f} RPC since {previous_run_name} run:* 📉\n"
-            for _, row in went_below_df.iterrows():
-                target_name = row[target_col] if not pd.isna(row[target_col]) else "Total RPC (including the ones below $12)"
-                previous_rpc = row[previous_rpc_col]
-                afternoon_rpc = row[rpc_col]
-                change = afternoon_rpc - previous_rpc
-                change_pct = (change / previous_rpc) * 100 if previous_rpc > 0 else 0
-                
-                below_list += f"• *{target_name}*: {previous_rpc:.2f} → {afternoon_rpc:.2f} ({change_pct:.1f}%)\n"
+            # Compute the percentage changes column-wise, then format each line once
+            target_names = went_below_df[target_col].to_numpy()
+            previous_rpcs = went_below_df[previous_rpc_col].to_numpy(dtype=np.float64)
+            afternoon_rpcs = went_below_df[rpc_col].to_numpy(dtype=np.float64)
+            change_pcts = np.divide(
+                afternoon_rpcs - previous_rpcs, previous_rpcs,
+                out=np.zeros_like(previous_rpcs), where=previous_rpcs > 0
+            ) * 100
+            
+            below_list = f"*Targets that FELL BELOW ${rpc_threshold:.2f} RPC since {previous_run_name} run:* 📉\n" + "".join(
+                map(below_line_format, target_names, previous_rpcs, afternoon_rpcs, change_pcts)
+            )
             
             message["blocks"].append({
                 "type": "section",
@@ -2522,11 +2752,13 @@ def send_afternoon_comparison_to_slack(targets_df, went_below_df, previous_run_n
         
         # Current targets BELOW threshold
         if not targets_df.empty:
-            current_list = f"*Current Targets Below ${rpc_threshold:.2f} RPC:* 📉\n"
-            for _, row in targets_df.iterrows():
-                target_name = row[target_col] if not pd.isna(row[target_col]) else "Total RPC (including the ones below $12)"
-                rpc_value = row[rpc_col]
-                current_list += f"• *{target_name}*: RPC = {rpc_value:.2f}\n"
+            current_parts = [f"*Current Targets Below ${rpc_threshold:.2f} RPC:* 📉\n"]
+            current_parts.extend(map(
+                current_line_format,
+                targets_df[target_col].to_numpy(),
+                targets_df[rpc_col].to_numpy(dtype=np.float64)
+            ))
+            current_list = "".join(current_parts)
             
             message["blocks"].append({
                 "type": "section",
@@ -2556,10 +2788,11 @@ def send_afternoon_comparison_to_slack(targets_df, went_below_df, previous_run_n
         })
         
         # Send the message
-        response = requests.post(
+        response = SLACK_SESSION.post(
             webhook_url,
             json=message,
-            headers={'Content-Type': 'application/json'}
+            headers={'Content-Type': 'application/json'},
+            timeout=10
         )
         
         if response.status_code == 200:
@@ -2573,13 +2806,53 @@ def send_afternoon_comparison_to_slack(targets_df, went_below_df, previous_run_n
         logger.error(f"Error sending afternoon comparison results to Slack: {str(e)}")
         return False
 
-def send_results_to_slack(message, results=None, error=False, screenshot_path=None):
+def post_to_slack_with_backoff(url, **kwargs):
+    """POST to Slack, backing off on HTTP 429 per Retry-After with exponential jittered delays"""
+    for attempt in range(SLACK_MAX_ATTEMPTS):
+        response = SLACK_SESSION.post(url, **kwargs)
+        if response.status_code != 429 or attempt == SLACK_MAX_ATTEMPTS - 1:
+            return response
+        
+        try:
+            retry_after = float(response.headers.get('Retry-After', 0))
+        except ValueError:
+            retry_after = 0
+        delay = max(retry_after, 2 ** attempt + random.random())
+        logger.warning(f"Slack rate limited the request, retrying in {delay:.1f}s (attempt {attempt + 1}/{SLACK_MAX_ATTEMPTS})")
+        time.sleep(delay)
+
+def flush_error_notifications():
+    """Post the error notifications batched by send_results_to_slack as a single message"""
+    with ERROR_NOTIFY_LOCK:
+        messages = PENDING_ERROR_MESSAGES[:]
+        PENDING_ERROR_MESSAGES.clear()
+        ERROR_NOTIFY_STATE['timer'] = None
+        ERROR_NOTIFY_STATE['last_sent'] = time.monotonic()
+    
+    if messages:
+        summary = f"{len(messages)} errors in the last {ERROR_COALESCE_SECONDS:.0f}s:\n" + "\n".join(f"• {m}" for m in messages)
+        send_results_to_slack(summary, error=True, coalesce=False)
+
+def send_results_to_slack(message, results=None, error=False, screenshot_path=None, coalesce=True):
     """Send results to Slack webhook"""
     try:
-        webhook_url = os.getenv('SLACK_WEBHOOK_URL')
+        webhook_url = SLACK_WEBHOOK_URL
         if not webhook_url:
             logger.error("No Slack webhook URL found in environment variables")
             return False
+        
+        # Batch bursts of errors so a cascading failure doesn't hit the webhook rate limit
+        if error and coalesce and not screenshot_path:
+            with ERROR_NOTIFY_LOCK:
+                now = time.monotonic()
+                if PENDING_ERROR_MESSAGES or now - ERROR_NOTIFY_STATE['last_sent'] < ERROR_COALESCE_SECONDS:
+                    PENDING_ERROR_MESSAGES.append(message)
+                    if ERROR_NOTIFY_STATE['timer'] is None:
+                        ERROR_NOTIFY_STATE['timer'] = threading.Timer(ERROR_COALESCE_SECONDS, flush_error_notifications)
+                        ERROR_NOTIFY_STATE['timer'].start()
+                    logger.info("Error notification batched with other recent errors")
+                    return True
+                ERROR_NOTIFY_STATE['last_sent'] = now
             
         logger.info(f"Sending {'error' if error else 'results'} to Slack")
         
@@ -2599,19 +2872,24 @@ def send_results_to_slack(message, results=None, error=False, screenshot_path=No
         # Add results table if results are provided
         if results is not None and not error and isinstance(results, pd.DataFrame) and not results.empty:
             # Format the results for Slack
-            targets_text = ""
+            targets_parts = []
             
-            # Format the targets data
-            for _, row in results.iterrows():
-                target_name = row.get('Target Name', 'Unknown')
-                rpc = float(row.get('RPC', 0.0))
-                calls = int(row.get('Calls', 0))
-                revenue = float(row.get('Revenue', 0.0))
-                
-                targets_text += f"• *{target_name}*\n"
-                targets_text += f"  - RPC: ${rpc:.2f}\n"
-                targets_text += f"  - Calls: {calls}\n"
-                targets_text += f"  - Revenue: ${revenue:.2f}\n\n"
+            # Format the targets data, defaulting any missing column
+            result_columns = results.reindex(columns=['Target Name', 'RPC', 'Calls', 'Revenue']).fillna(
+                {'Target Name': 'Unknown', 'RPC': 0.0, 'Calls': 0, 'Revenue': 0.0}
+            )
+            for target_name, rpc, calls, revenue in result_columns.itertuples(index=False, name=None):
+                rpc = float(rpc)
+                calls = int(calls)
+                revenue = float(revenue)
+                
+                targets_parts.append(
+                    f"• *{target_name}*\n"
+                    f"  - RPC: ${rpc:.2f}\n"
+                    f"  - Calls: {calls}\n"
+                    f"  - Revenue: ${revenue:.2f}\n\n"
+                )
+            targets_text = "".join(targets_parts)
             
             if targets_text:
                 payload["blocks"].append({
@@ -2628,23 +2906,24 @@ def send_results_to_slack(message, results=None, error=False, screenshot_path=No
             
             # Upload the screenshot to Slack
             with open(screenshot_path, 'rb') as img:
-                response = requests.post(
+                response = SLACK_SESSION.post(
                     'https://slack.com/api/files.upload',
                     data={
-                        'channels': os.getenv('SLACK_CHANNEL', ''),
+                        'channels': SLACK_CHANNEL,
                         'title': 'Screenshot',
                         'filename': os.path.basename(screenshot_path),
                         'initial_comment': 'Screenshot attached'
                     },
                     files={'file': img},
-                    headers={'Authorization': f'Bearer {os.getenv("SLACK_BOT_TOKEN", "")}'} 
+                    headers={'Authorization': f'Bearer {SLACK_BOT_TOKEN}'},
+                    timeout=30
                 )
                 
                 if response.status_code != 200 or not response.json().get('ok', False):
                     logger.warning(f"Failed to upload screenshot: {response.json()}")
         
         # Send the message
-        response = requests.post(webhook_url, json=payload)
+        response = post_to_slack_with_backoff(webhook_url, json=payload, timeout=10)
         
         if response.status_code != 200:
             logger.error(f"Failed to send message to Slack: {response.status_code} {response.text}")
@@ -2657,63 +2936,135 @@ def send_results_to_slack(message, results=None, error=False, screenshot_path=No
         logger.error(f"Error sending to Slack: {str(e)}")
         return False
 
+def fetch_rpc_via_api():
+    """Fetch today's per-target RPC from the Ringba insights API and save it as a CSV"""
+    if not RINGBA_API_TOKEN or not RINGBA_ACCOUNT_ID:
+        return None
+    
+    try:
+        logger.info("Fetching today's RPC by target from the Ringba API...")
+        
+        # Same auth header formats as RingbaDirectAPI
+        auth_format = RINGBA_AUTH_FORMAT
+        headers = {
+            "Content-Type": "application/json",
+            "Authorization": RINGBA_API_TOKEN if auth_format == "NoPrefix" else f"{auth_format} {RINGBA_API_TOKEN}"
+        }
+        
+        # Today in Eastern time, with the correct UTC offset for DST
+        eastern_tz = pytz.timezone('America/New_York')
+        today = datetime.now(eastern_tz).date()
+        start_datetime = eastern_tz.localize(datetime(today.year, today.month, today.day)).isoformat(timespec='milliseconds')
+        end_datetime = eastern_tz.localize(datetime(today.year, today.month, today.day, 23, 59, 59, 999000)).isoformat(timespec='milliseconds')
+        
+        request_body = {
+            "startDate": start_datetime,
+            "endDate": end_datetime,
+            "reportStart": start_datetime,
+            "reportEnd": end_datetime,
+            "timeField": "connectTime",
+            "timeZone": "America/New_York",
+            "groupBy": ["targetName"],
+            "metrics": ["calls", "revenue", "rpc"],
+            "filters": [],
+            "page": 1,
+            "pageSize": 1000
+        }
+        
+        response = RINGBA_SESSION.post(
+            f"https://api.ringba.com/v2/{RINGBA_ACCOUNT_ID}/insights",
+            headers=headers,
+            json=request_body,
+            timeout=(5, 30)
+        )
+        if not response.ok:
+            logger.warning(f"Ringba API returned {response.status_code}, falling back to browser export")
+            return None
+        
+        data = response.json()
+        records = data.get('report', {}).get('records') or data.get('items') or []
+        rows = [
+            {'Target': record['targetName'], 'RPC': record['rpc']}
+            for record in records
+            if record.get('targetName') and record.get('rpc') is not None
+        ]
+        if not rows:
+            logger.warning("Ringba API response had no target RPC data, falling back to browser export")
+            return None
+        
+        # Save to CSV file so it goes through the same processing as the browser extracts
+        file_path = os.path.join("/tmp", f"api_extract_{int(time.time())}.csv")
+        pd.DataFrame(rows).to_csv(file_path, index=False)
+        
+        logger.info(f"Saved {len(rows)} targets from the Ringba API to {file_path}")
+        return file_path
+    except Exception as e:
+        logger.warning(f"Ringba API request failed, falling back to browser export: {str(e)}")
+        return None
+
 def export_csv():
     """Export CSV from Ringba and notify Slack for any targets with RPC below threshold"""
-    browser = None
     try:
         # Determine the current time in Eastern time
         eastern_tz = pytz.timezone('America/New_York')
         now = datetime.now(eastern_tz)
         
-        # Format for checking times
-        current_time_str = now.strftime('%H:%M')
+        # Minutes since midnight for checking times
+        current_minutes = now.hour * 60 + now.minute
         
         # Determine which type of run this is based on time
-        if check_time_range(current_time_str, MORNING_CHECK_TIME):
+        if check_time_range(current_minutes, MORNING_CHECK_MINUTES):
             logger.info("Processing morning run (11 AM ET)")
             run_type = "Morning"
-        elif check_time_range(current_time_str, MIDDAY_CHECK_TIME):
+        elif check_time_range(current_minutes, MIDDAY_CHECK_MINUTES):
             logger.info("Processing midday run (2 PM ET)")
             run_type = "Midday"
-        elif check_time_range(current_time_str, AFTERNOON_CHECK_TIME):
+        elif check_time_range(current_minutes, AFTERNOON_CHECK_MINUTES):
             logger.info("Processing afternoon run (4:30 PM ET)")
             run_type = "Afternoon"
         else:
             run_type = "Manual"
-            logger.info(f"Processing manual run at {current_time_str} ET")
+            logger.info(f"Processing manual run at {now.strftime('%H:%M')} ET")
             
-        # Start the browser
-        browser = setup_browser()
-        if not browser:
-            logger.error("Failed to set up browser")
-            return False
+        # The API returns the same per-target RPC numbers in well under a second, so try it
+        # before paying for a browser launch; the browser is only the fallback
+        csv_file_path = fetch_rpc_via_api()
+        
+        if csv_file_path:
+            logger.info(f"Using Ringba API data from {csv_file_path}, skipping browser export")
+        else:
+            # Start the browser, or reuse the one from the previous run
+            with shared_browser() as browser:
+                if not browser:
+                    logger.error("Failed to set up browser")
+                    return False
 
-        # Login to Ringba
-        if not login_to_ringba(browser):
-            logger.error("Failed to login to Ringba")
-            return False
+                # Login to Ringba
+                if not login_to_ringba(browser):
+                    logger.error("Failed to login to Ringba")
+                    return False
 
-        # Navigate to Call Logs
-        if not navigate_to_call_logs(browser):
-            logger.error("Failed to navigate to Call Logs")
-            return False
+                # Navigate to Call Logs
+                if not navigate_to_call_logs(browser):
+                    logger.error("Failed to navigate to Call Logs")
+                    return False
 
-        # Click Export CSV
-        max_retries = 3
-        csv_file_path = None
+                # Click Export CSV
+                max_retries = 3
+                csv_file_path = None
         
-        for attempt in range(max_retries):
-            logger.info(f"Export attempt {attempt+1}/{max_retries}")
-            csv_file_path = click_export_csv(browser)
+                for attempt in range(max_retries):
+                    logger.info(f"Export attempt {attempt+1}/{max_retries}")
+                    csv_file_path = click_export_csv(browser)
             
-            if csv_file_path:
-                logger.info(f"Successfully exported CSV file: {csv_file_path}")
-                break
-            elif attempt < max_retries - 1:
-                logger.warning(f"Export attempt {attempt+1} failed, retrying...")
-                time.sleep(5)  # Wait before retry
-            else:
-                logger.error("All export attempts failed")
+                    if csv_file_path:
+                        logger.info(f"Successfully exported CSV file: {csv_file_path}")
+                        break
+                    elif attempt < max_retries - 1:
+                        logger.warning(f"Export attempt {attempt+1} failed, retrying...")
+                        time.sleep(5)  # Wait before retry
+                    else:
+                        logger.error("All export attempts failed")
         
         if not csv_file_path:
             logger.error("Failed to export CSV file after all attempts")
@@ -2738,9 +3089,9 @@ def export_csv():
                     ]
                 }
                 
-                webhook_url = os.getenv('SLACK_WEBHOOK_URL')
+                webhook_url = SLACK_WEBHOOK_URL
                 if webhook_url:
-                    requests.post(webhook_url, json=error_message)
+                    SLACK_SESSION.post(webhook_url, json=error_message, timeout=10)
                     logger.info("Sent failure notification to Slack")
             except Exception as err:
                 logger.error(f"Failed to send failure notification: {str(err)}")
@@ -2772,9 +3123,9 @@ def export_csv():
                     ]
                 }
                 
-                webhook_url = os.getenv('SLACK_WEBHOOK_URL')
+                webhook_url = SLACK_WEBHOOK_URL
                 if webhook_url:
-                    requests.post(webhook_url, json=no_targets_message)
+                    SLACK_SESSION.post(webhook_url, json=no_targets_message, timeout=10)
                     logger.info("Sent 'no targets' notification to Slack")
             except Exception as err:
                 logger.error(f"Failed to send 'no targets' notification: {str(err)}")
@@ -2791,9 +3142,6 @@ def export_csv():
     except Exception as e:
         logger.error(f"Failed to export CSV: {str(e)}")
         return False
-    finally:
-        if browser:
-            browser.quit()
 
 def perform_test_run():
     """Perform a test run when the service is first deployed"""
@@ -2811,6 +3159,118 @@ def perform_test_run():
     except Exception as e:
         logger.error(f"Error during test run: {str(e)}")
         return False
+    finally:
+        TEST_RUN_DONE.set()
+
+def run_locked_export(check_name):
+    """Run a scheduled export unless another process already holds the export lock"""
+    if fcntl is None:
+        return export_csv()
+    
+    with open(EXPORT_LOCK_FILE, "w") as lock_file:
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            logger.warning(f"Another process is already running an export, skipping the {check_name} check")
+            return None
+        try:
+            return export_csv()
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+def run_scheduled_checks():
+    """Register the weekday checks and run them until shutdown is requested"""
+    # Only the long-running scheduler needs this; one-shot cron runs skip the import
+    import schedule
+    
+    logger.info("Setting up scheduled checks...")
+    
+    # Checks run on a worker thread so a slow export never delays the heartbeat. There is one
+    # shared browser, so a single worker runs them in order and an overlapping check waits its turn
+    check_pool = concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix="check")
+    
+    def report_check_result(check_name, future):
+        if future.cancelled():
+            logger.warning(f"The {check_name} check was cancelled before it ran")
+            return
+        error = future.exception()
+        if error is not None:
+            logger.error(f"Error in {check_name} check: {str(error)}")
+            send_results_to_slack(f"Error in {check_name} check: {str(error)}", error=True)
+    
+    def submit_check(check_name):
+        logger.info(f"Queueing {check_name} check")
+        future = check_pool.submit(run_locked_export, check_name)
+        future.add_done_callback(lambda done: report_check_result(check_name, done))
+    
+    # Schedule the checks
+    schedule.every().monday.at(MORNING_CHECK_TIME).do(submit_check, 'morning').tag('ringba')
+    schedule.every().tuesday.at(MORNING_CHECK_TIME).do(submit_check, 'morning').tag('ringba')
+    schedule.every().wednesday.at(MORNING_CHECK_TIME).do(submit_check, 'morning').tag('ringba')
+    schedule.every().thursday.at(MORNING_CHECK_TIME).do(submit_check, 'morning').tag('ringba')
+    schedule.every().friday.at(MORNING_CHECK_TIME).do(submit_check, 'morning').tag('ringba')
+    
+    schedule.every().monday.at(MIDDAY_CHECK_TIME).do(submit_check, 'midday').tag('ringba')
+    schedule.every().tuesday.at(MIDDAY_CHECK_TIME).do(submit_check, 'midday').tag('ringba')
+    schedule.every().wednesday.at(MIDDAY_CHECK_TIME).do(submit_check, 'midday').tag('ringba')
+    schedule.every().thursday.at(MIDDAY_CHECK_TIME).do(submit_check, 'midday').tag('ringba')
+    schedule.every().friday.at(MIDDAY_CHECK_TIME).do(submit_check, 'midday').tag('ringba')
+    
+    schedule.every().monday.at(AFTERNOON_CHECK_TIME).do(submit_check, 'afternoon').tag('ringba')
+    schedule.every().tuesday.at(AFTERNOON_CHECK_TIME).do(submit_check, 'afternoon').tag('ringba')
+    schedule.every().wednesday.at(AFTERNOON_CHECK_TIME).do(submit_check, 'afternoon').tag('ringba')
+    schedule.every().thursday.at(AFTERNOON_CHECK_TIME).do(submit_check, 'afternoon').tag('ringba')
+    schedule.every().friday.at(AFTERNOON_CHECK_TIME).do(submit_check, 'afternoon').tag('ringba')
+    
+    logger.info("Scheduler set up. Waiting for scheduled times...")
+    
+    # Self-pipe: SIGTERM only writes a byte to this socket pair, which wakes the select() below.
+    # A socket pair rather than os.pipe() because select() on Windows only accepts sockets
+    wakeup_reader, wakeup_writer = socket.socketpair()
+    wakeup_writer.setblocking(False)
+    shutdown = {'requested': False}
+    if threading.current_thread() is threading.main_thread():
+        def shutdown_handler(signum, frame):
+            # This runs between the main thread's bytecodes, possibly while it holds a lock
+            # (logging, the queue), so only set the flag and write the wakeup byte here
+            shutdown['requested'] = True
+            # A second SIGTERM terminates immediately, e.g. if an export is stuck
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            try:
+                wakeup_writer.send(b"\0")
+            except OSError:
+                pass
+        
+        signal.signal(signal.SIGTERM, shutdown_handler)
+    
+    last_heartbeat = None
+    logged_no_checks = False
+    while not shutdown['requested']:
+        schedule.run_pending()
+        
+        # Block until the next check instead of polling every second, but wake at least
+        # once per heartbeat interval for the log that prevents the Render.com timeout
+        idle_seconds = schedule.idle_seconds()
+        now = time.monotonic()
+        if idle_seconds is None:
+            # Nothing will run until jobs are registered again, so say so once rather than every interval
+            if not logged_no_checks:
+                logger.info(f"Heartbeat: Still alive. No scheduled checks pending.")
+                logged_no_checks = True
+        elif last_heartbeat is None or now - last_heartbeat >= HEARTBEAT_INTERVAL_SECONDS:
+            logger.info(f"Heartbeat: Still alive. Next check in {timedelta(seconds=int(max(idle_seconds, 0)))}")
+            last_heartbeat = now
+            logged_no_checks = False
+        
+        if idle_seconds is not None:
+            select.select([wakeup_reader], [], [], min(HEARTBEAT_INTERVAL_SECONDS, max(idle_seconds, 0)))
+        else:
+            select.select([wakeup_reader], [], [], HEARTBEAT_INTERVAL_SECONDS)
+    
+    wakeup_reader.close()
+    wakeup_writer.close()
+    logger.info("Shutdown requested, leaving scheduler loop")
+    check_pool.shutdown(wait=False)
 
 def main():
     """Main function that runs the export process based on schedule or command-line arguments"""
@@ -2818,12 +3278,7 @@ def main():
         # Get run_label from environment variable or command line argument
         run_label = os.getenv('RUN_LABEL', '').lower() or (sys.argv[1].lower() if len(sys.argv) > 1 else '')
         
-        # Set up times for scheduled checks
-        morning_check_time = os.getenv('MORNING_CHECK_TIME', '11:00')
-        midday_check_time = os.getenv('MIDDAY_CHECK_TIME', '14:00')
-        afternoon_check_time = os.getenv('AFTERNOON_CHECK_TIME', '16:30')
-        
-        logger.info(f"Scheduled check times: Morning={morning_check_time}, Midday={midday_check_time}, Afternoon={afternoon_check_time}")
+        logger.info(f"Scheduled check times: Morning={MORNING_CHECK_TIME}, Midday={MIDDAY_CHECK_TIME}, Afternoon={AFTERNOON_CHECK_TIME}")
         
         # If command-line argument or env var specifies a specific run, do it immediately
         if run_label in ['morning', 'midday', 'afternoon']:
@@ -2846,47 +3301,8 @@ def main():
             logger.info("Initial check complete. Will exit to let Render handle scheduling.")
             return
             
-        # For scheduled operation, set up schedule
-        logger.info("Setting up scheduled checks...")
-        
-        # Schedule the checks
-        schedule.every().monday.at(morning_check_time).do(export_csv).tag('ringba')
-        schedule.every().tuesday.at(morning_check_time).do(export_csv).tag('ringba')
-        schedule.every().wednesday.at(morning_check_time).do(export_csv).tag('ringba')
-        schedule.every().thursday.at(morning_check_time).do(export_csv).tag('ringba')
-        schedule.every().friday.at(morning_check_time).do(export_csv).tag('ringba')
-        
-        schedule.every().monday.at(midday_check_time).do(export_csv).tag('ringba')
-        schedule.every().tuesday.at(midday_check_time).do(export_csv).tag('ringba')
-        schedule.every().wednesday.at(midday_check_time).do(export_csv).tag('ringba')
-        schedule.every().thursday.at(midday_check_time).do(export_csv).tag('ringba')
-        schedule.every().friday.at(midday_check_time).do(export_csv).tag('ringba')
-        
-        schedule.every().monday.at(afternoon_check_time).do(export_csv).tag('ringba')
-        schedule.every().tuesday.at(afternoon_check_time).do(export_csv).tag('ringba')
-        schedule.every().wednesday.at(afternoon_check_time).do(export_csv).tag('ringba')
-        schedule.every().thursday.at(afternoon_check_time).do(export_csv).tag('ringba')
-        schedule.every().friday.at(afternoon_check_time).do(export_csv).tag('ringba')
-        
-        logger.info("Scheduler set up. Waiting for scheduled times...")
-        
-        heartbeat_counter = 0
-        while True:
-            schedule.run_pending()
-            
-            # Add heartbeat every minute to prevent Render.com timeout
-            heartbeat_counter += 1
-            if heartbeat_counter >= 60:
-                now = datetime.now()
-                next_run = schedule.next_run()
-                if next_run:
-                    time_until_next = next_run - now
-                    logger.info(f"Heartbeat: Still alive. Next check in {time_until_next}")
-                else:
-                    logger.info(f"Heartbeat: Still alive. No scheduled checks pending.")
-                heartbeat_counter = 0
-                
-            time.sleep(1)  # Check every second
+        # For scheduled operation, set up schedule and wait for the checks
+        run_scheduled_checks()
             
     except KeyboardInterrupt:
         logger.info("Script interrupted by user")
@@ -2898,21 +3314,53 @@ def main():
 
 if __name__ == "__main__":
     # Check if we're running as a web service (PORT environment variable is set)
-    is_web_service = bool(os.getenv('PORT'))
-    
-    if is_web_service:
-        logger.info("Running as web service, performing initial test run...")
-        perform_test_run()
-        logger.info("Test run complete, service will now wait for scheduled runs")
+    if IS_WEB_SERVICE:
+        logger.info("Running as web service, starting initial test run in the background...")
+        # Run the test export alongside the web server so the port is bound immediately
+        threading.Thread(target=perform_test_run, daemon=True, name="initial-test-run").start()
+        
+        # The web server owns the main thread, so the scheduled checks run beside it
+        def scheduler_worker():
+            try:
+                run_scheduled_checks()
+            except Exception as e:
+                logger.error(f"Error in scheduler thread: {str(e)}")
+                send_results_to_slack(f"Error in scheduler thread: {str(e)}", error=True)
+        
+        threading.Thread(target=scheduler_worker, daemon=True, name="scheduler").start()
         
         # Start Flask app for web service
         from flask import Flask, send_from_directory, render_template_string
         import glob
         app = Flask(__name__)
         
-        @app.route('/')
-        def home():
-            return "Ringba Export Service is running. Scheduled runs at 11 AM, 2 PM, and 4:30 PM ET."
+        # Health probes hit these every few seconds; answer them with prebuilt bytes
+        # ahead of Flask's request dispatch and hand everything else to Flask
+        health_responses = {
+            '/': b"Ringba Export Service is running. Scheduled runs at 11 AM, 2 PM, and 4:30 PM ET.",
+            '/healthz': b"ok",
+        }
+        flask_wsgi_app = app.wsgi_app
+        
+        def health_wsgi_app(environ, start_response):
+            body = health_responses.get(environ.get('PATH_INFO'))
+            if body is None or environ.get('REQUEST_METHOD') not in ('GET', 'HEAD'):
+                return flask_wsgi_app(environ, start_response)
+            start_response('200 OK', [
+                ('Content-Type', 'text/plain; charset=utf-8'),
+                ('Content-Length', str(len(body))),
+                # Never let a proxy answer a liveness probe for a process that has died
+                ('Cache-Control', 'no-store'),
+            ])
+            return [body]
+        
+        app.wsgi_app = health_wsgi_app
+        
+        @app.route('/ready')
+        def ready():
+            if TEST_RUN_DONE.is_set():
+                return "ready"
+            return "initial test run in progress", 503
         
         @app.route('/screenshots')
         def list_screenshots():
@@ -2983,24 +3431,39 @@ if __name__ == "__main__":
             """Serve a specific screenshot file"""
             return send_from_directory(screenshots_dir, filename)
         
-        # Get port from environment variable
-        port = int(os.getenv('PORT', 8080))
-        app.run(host='0.0.0.0', port=port)
+        try:
+            # Threaded production server; Werkzeug's dev server is only the fallback
+            from waitress import serve
+        except ImportError:
+            serve = None
+        
+        if serve is None or app.debug:
+            app.run(host='0.0.0.0', port=PORT)
+        else:
+            serve(app, host='0.0.0.0', port=PORT, threads=4)
     else:
         # Regular command-line execution
         logger.info("Running as command-line tool")
         
         # Set a global timeout for the entire process
-        def timeout_handler():
-            logger.error("Global timeout reached, forcing script termination")
-            # Force terminate the process
-            os.kill(os.getpid(), signal.SIGTERM)
+        def timeout_handler(*args):
+            # This can interrupt the main thread while it holds a logging or queue lock, so take
+            # no locks here: write straight to stderr instead of going through the logger
+            os.write(2, b"Global timeout reached, forcing script termination\n")
+            # Exit immediately, skipping atexit hooks and thread joins that may be stuck too (124 = timeout)
+            os._exit(124)
         
         # Set 10 minute timeout for the entire process
-        global_timeout = int(os.getenv("GLOBAL_TIMEOUT_MINUTES", "10")) * 60
-        timer = threading.Timer(global_timeout, timeout_handler)
-        timer.daemon = True
-        timer.start()
+        timer = None
+        if hasattr(signal, 'SIGALRM'):
+            # Kernel-managed alarm, no watchdog thread needed
+            signal.signal(signal.SIGALRM, timeout_handler)
+            signal.alarm(GLOBAL_TIMEOUT_SECONDS)
+        else:
+            # Windows has no SIGALRM, fall back to a timer thread
+            timer = threading.Timer(GLOBAL_TIMEOUT_SECONDS, timeout_handler)
+            timer.daemon = True
+            timer.start()
         
         try:
             # Run export
@@ -3008,6 +3471,9 @@ if __name__ == "__main__":
         except Exception as e:
             logger.error(f"Unhandled exception in main process: {str(e)}")
         finally:
-            # Cancel timer if script completes normally
-            timer.cancel()
+            # Cancel the timeout if script completes normally
+            if timer is not None:
+                timer.cancel()
+            else:
+                signal.alarm(0)
             logger.info("Script execution complete") 